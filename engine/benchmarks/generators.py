@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic inputs for benchmarks: PR corpora, SARIF, repos."""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from engine.matcher import LANGUAGE_EXTENSIONS, PLACEHOLDER
+
+# Corpus sizes used by the benchmark tiers
+CORPUS_SIZES = {'small': 1_000, 'medium': 20_000, 'large': 1_000_000}
+
+OWNERS = ['acme', 'globex', 'initech', 'umbrella', 'hooli', 'stark', 'wayne', 'wonka']
+AUTHORS = [f"dev{i:03d}" for i in range(200)]
+
+# Title families give the clustering stage realistic structure
+TITLE_FAMILIES = [
+    "Security: remove hardcoded {noun} from {module}",
+    "Bump {package} from {old} to {new}",
+    "Fix: add null check for {noun} in {module}",
+    "Replace deprecated {noun} API in {module}",
+    "Add error handling to {module} {noun} loader",
+    "Remove unused import of {package} in {module}",
+    "Add TypeScript types for {module} {noun}",
+    "Docs: update {module} README",
+]
+NOUNS = ['token', 'secret', 'password', 'config', 'session', 'buffer', 'request', 'cache']
+MODULES = ['auth', 'api', 'parser', 'cli', 'server', 'client', 'utils', 'db']
+PACKAGES = ['lodash', 'minimist', 'axios', 'express', 'requests', 'urllib3', 'jinja2', 'yaml']
+LABELS = ['security', 'dependencies', 'bug', 'cleanup', 'docs', 'types']
+
+BASE_TIME = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def generate_prs(count: int, seed: int = 0, repos: int = 100) -> Iterator[Dict]:
+    """
+    Yield PRMetadata-compatible dicts.
+
+    Args:
+        count: Number of PRs
+        seed: RNG seed; same seed -> identical corpus
+        repos: Number of distinct repositories
+    """
+    rng = random.Random(seed)
+    numbers: Dict[int, int] = {}
+    for _ in range(count):
+        repo_index = rng.randrange(repos)
+        numbers[repo_index] = numbers.get(repo_index, 0) + 1
+        title = rng.choice(TITLE_FAMILIES).format(
+            noun=rng.choice(NOUNS),
+            module=rng.choice(MODULES),
+            package=rng.choice(PACKAGES),
+            old=f"1.{rng.randrange(10)}.{rng.randrange(10)}",
+            new=f"2.{rng.randrange(10)}.{rng.randrange(10)}",
+        )
+        created = BASE_TIME + timedelta(minutes=rng.randrange(60 * 24 * 700))
+        merge_hours = round(rng.lognormvariate(0.5, 1.2) + 0.5, 3)
+        merged = created + timedelta(hours=merge_hours)
+        has_revert = rng.random() < 0.03
+        additions = rng.randrange(1, 400)
+        deletions = rng.randrange(0, 200)
+        yield {
+            'repo': f"repo{repo_index:04d}",
+            'owner': OWNERS[repo_index % len(OWNERS)],
+            'pr_number': numbers[repo_index],
+            'title': title,
+            'body': f"{title}.\n\nThis change was generated for benchmarking.",
+            'created_at': _iso(created),
+            'merged_at': _iso(merged),
+            'closed_at': _iso(merged),
+            'merge_time_hours': merge_hours,
+            'author': rng.choice(AUTHORS),
+            'files_changed': rng.randrange(1, 20),
+            'additions': additions,
+            'deletions': deletions,
+            'comments': rng.randrange(0, 10),
+            'review_comments': rng.randrange(0, 15),
+            'commits': rng.randrange(1, 8),
+            'labels': rng.sample(LABELS, rng.randrange(0, 3)),
+            'merged': True,
+            'is_security_related': not title.startswith('Docs'),
+            'has_revert': has_revert,
+            'revert_time_hours': round(rng.uniform(1, 72), 3) if has_revert else None,
+        }
+
+
+def write_prs_jsonl(path: str, count: int, seed: int = 0) -> Path:
+    """Write a corpus to JSONL (streamed; safe for the 1M tier)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        for pr in generate_prs(count, seed):
+            f.write(json.dumps(pr) + '\n')
+    return path
+
+
+def render_hit(template: Dict, rng: random.Random, index: int) -> str:
+    """A line of code that the template's `match` pattern hits."""
+    values = {
+        'VAR': f"token{index}", 'OBJ': f"client{index}", 'METHOD': 'connect',
+        'FUNC': f"handler{index}", 'PARAMS': 'req, res', 'CODE': 'run();',
+        'SECRET': f"s3cr3t{rng.randrange(10 ** 6)}", 'package': rng.choice(PACKAGES),
+        'old_version': f"1.{rng.randrange(10)}.0", 'module': rng.choice(PACKAGES),
+    }
+    match = template['pattern']['match']
+    return PLACEHOLDER.sub(lambda m: values.get(m.group(1), f"x{index}"), match)
+
+
+def generate_repo(
+    root: str,
+    templates: List[Dict],
+    files: int = 200,
+    lines_per_file: int = 200,
+    hit_rate: float = 0.02,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """
+    Write a synthetic JS/TS/Python repository seeded with template hits.
+
+    Returns:
+        Number of hits seeded per template id
+    """
+    rng = random.Random(seed)
+    root_path = Path(root)
+    extensions = ['.js', '.ts', '.py']
+    filler = {
+        '.js': "function f{i}(a) {{ return a + {i}; }}",
+        '.ts': "const v{i}: number = {i};",
+        '.py': "v{i} = {i}",
+    }
+    seeded = {t['id']: 0 for t in templates}
+    for n in range(files):
+        ext = extensions[n % len(extensions)]
+        candidates = [
+            t for t in templates
+            if ext in {e for lang in t.get('languages', []) for e in LANGUAGE_EXTENSIONS.get(lang, [])}
+            and (t.get('pattern') or {}).get('match')
+        ]
+        lines = []
+        for i in range(lines_per_file):
+            if candidates and rng.random() < hit_rate:
+                template = rng.choice(candidates)
+                lines.append(render_hit(template, rng, i))
+                seeded[template['id']] += 1
+            else:
+                lines.append(filler[ext].format(i=i))
+        path = root_path / f"src/pkg{n % 10}/module{n}{ext}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('\n'.join(lines) + '\n')
+    return seeded
+
+
+def generate_sarif(count: int, templates: List[Dict], seed: int = 0) -> Dict:
+    """A SARIF 2.1.0 report with one result per finding."""
+    rng = random.Random(seed)
+    usable = [t for t in templates if (t.get('pattern') or {}).get('match')]
+    results = []
+    for i in range(count):
+        template = rng.choice(usable)
+        results.append({
+            'ruleId': template['id'],
+            'level': 'warning',
+            'message': {'text': template['name']},
+            'locations': [{
+                'physicalLocation': {
+                    'artifactLocation': {'uri': f"src/module{i % 500}.js"},
+                    'region': {
+                        'startLine': rng.randrange(1, 500),
+                        'snippet': {'text': render_hit(template, rng, i)},
+                    },
+                },
+            }],
+        })
+    return {
+        'version': '2.1.0',
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'runs': [{
+            'tool': {'driver': {
+                'name': 'synthetic-scanner',
+                'rules': [{'id': t['id'], 'name': t['name']} for t in usable],
+            }},
+            'results': results,
+        }],
+    }
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Reproducible offline benchmarks for the research pipeline and engine.
+
+Usage:
+    python -m engine.benchmarks.run_benchmarks --tier small
+    python -m engine.benchmarks.run_benchmarks --tier medium --only scan,fix
+    python -m engine.benchmarks.run_benchmarks --tier small --update-baseline
+    python -m engine.benchmarks.run_benchmarks --tier large --only load,embed_int8 --memory
+
+Inputs are generated deterministically from `--seed`, embeddings come from
+a feature-hashing stub model and collection runs against a local fake GitHub
+server, so no network access is needed. Timings are normalized by a fixed
+pure-Python calibration workload so a baseline recorded on one machine is
+comparable on another.
+
+With `--memory`, each benchmark's setup and one run first execute in a
+forked process whose peak RSS is reported as `peak_rss_mb`. Peak RSS is
+reported only, never compared against the baseline.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from engine.benchmarks.generators import (
+    CORPUS_SIZES, generate_prs, generate_repo, generate_sarif, write_prs_jsonl,
+)
+from engine.matcher import TemplateMatcher
+from engine.templates import TemplateRegistry
+
+logger = logging.getLogger(__name__)
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+# Short benchmarks repeat until they have run at least this long, so a
+# millisecond workload is not timed from a handful of noisy samples
+MIN_SECONDS = 0.5
+
+# Per-tier caps for benchmarks whose cost is superlinear or network-bound
+REPO_FILES = {'small': 100, 'medium': 1_000, 'large': 10_000}
+CLUSTER_MAX_PRS = {'small': 1_000, 'medium': 20_000, 'large': 20_000}
+COLLECT_MAX_PRS = {'small': 200, 'medium': 1_000, 'large': 1_000}
+
+
+@dataclass
+class BenchContext:
+    """Shared, lazily generated benchmark inputs."""
+    tier: str
+    seed: int
+    workdir: Path
+    registry: TemplateRegistry
+
+    @property
+    def corpus_size(self) -> int:
+        return CORPUS_SIZES[self.tier]
+
+    def corpus_file(self) -> Path:
+        path = self.workdir / f"prs-{self.tier}-{self.seed}.jsonl"
+        if not path.exists():
+            logger.info(f"Generating {self.corpus_size} PRs -> {path}")
+            write_prs_jsonl(str(path), self.corpus_size, self.seed)
+        return path
+
+    def repo_dir(self) -> Path:
+        path = self.workdir / f"repo-{self.tier}-{self.seed}"
+        if not path.exists():
+            logger.info(f"Generating synthetic repository -> {path}")
+            generate_repo(str(path), list(self.registry.templates.values()),
+                          files=REPO_FILES[self.tier], seed=self.seed)
+        return path
+
+
+Benchmark = Callable[[BenchContext], Tuple[Callable[[], object], int]]
+
+
+def bench_calibration(ctx: BenchContext):
+    """Fixed CPU workload used to normalize timings across machines."""
+    def run():
+        digest = b''
+        for i in range(200_000):
+            digest = hashlib.sha256(digest + i.to_bytes(4, 'little')).digest()
+        return digest
+    return run, 200_000
+
+
+def _extractor(ctx: BenchContext, **engine_options):
+    from research.embeddings import EmbeddingEngine
+    from research.extractors.pattern_extractor import PatternExtractor
+    engine = EmbeddingEngine('hashing', **engine_options)
+    return PatternExtractor(input_file=str(ctx.corpus_file()), embedder=engine)
+
+
+def bench_load(ctx: BenchContext):
+    from research.models.pr import DiffColumns
+    extractor = _extractor(ctx)
+    path = str(ctx.corpus_file())
+    return lambda: DiffColumns.from_jsonl(path, extractor.analyze_pr), ctx.corpus_size
+
+
+def bench_embed(ctx: BenchContext):
+    from research.models.pr import DiffColumns
+    extractor = _extractor(ctx)
+    diffs = DiffColumns.from_jsonl(str(ctx.corpus_file()), extractor.analyze_pr)
+    return lambda: extractor.embed(diffs), len(diffs)
+
+
+def bench_embed_int8(ctx: BenchContext):
+    """Embedding across all CPUs with int8 storage."""
+    from research.models.pr import DiffColumns
+    extractor = _extractor(ctx, workers=0, batch_size=256, dtype='int8')
+    diffs = DiffColumns.from_jsonl(str(ctx.corpus_file()), extractor.analyze_pr)
+    return lambda: extractor.embed(diffs), len(diffs)
+
+
+def bench_cluster(ctx: BenchContext):
+    extractor = _extractor(ctx)
+    prs = list(islice(generate_prs(ctx.corpus_size, ctx.seed), CLUSTER_MAX_PRS[ctx.tier]))
+    diffs = [extractor.analyze_pr(pr) for pr in prs]
+    embeddings = extractor.embed(diffs)
+    return lambda: extractor.cluster_patterns(diffs, embeddings), len(diffs)
+
+
+def bench_score(ctx: BenchContext):
+    from research.scoring.confidence_scorer import ConfidenceScorer
+    patterns = []
+    for i, pr in enumerate(islice(generate_prs(ctx.corpus_size, ctx.seed), ctx.corpus_size // 10)):
+        patterns.append({'cluster_id': i, 'evidence': {
+            'occurrence_count': pr['commits'] * 10,
+            'repo_count': pr['commits'],
+            'median_merge_hours': pr['merge_time_hours'],
+            'median_discussion_density': pr['review_comments'] / 100,
+            'revert_rate': 0.1 if pr['has_revert'] else 0.0,
+        }})
+    return lambda: ConfidenceScorer.score_patterns(patterns), len(patterns)
+
+
+def bench_collect(ctx: BenchContext):
+    os.environ.setdefault('GITHUB_TOKEN', 'offline-benchmark')
+    from engine.benchmarks.stubs import FakeGitHubServer
+    from research.collectors import github_collector
+
+    prs = list(islice(generate_prs(ctx.corpus_size, ctx.seed, repos=10), COLLECT_MAX_PRS[ctx.tier]))
+    repos = sorted({f"{pr['owner']}/{pr['repo']}" for pr in prs})
+
+    def run():
+        with FakeGitHubServer(prs) as server:
+            github_collector.GITHUB_API_BASE = server.url
+            collector = github_collector.GitHubCollector(
+                repos, output_file=str(ctx.workdir / "collected.jsonl"),
+                max_prs_per_repo=len(prs), min_merge_time_hours=0, request_delay=0,
+            )
+            return sum(1 for _ in collector.collect_prs(include_security_only=False))
+    return run, len(prs)
+
+
+def bench_scan(ctx: BenchContext):
+    repo = str(ctx.repo_dir())
+    matchers = [TemplateMatcher(t) for t in ctx.registry.ranked()]
+    return lambda: [m.scan(repo) for m in matchers], REPO_FILES[ctx.tier]
+
+
+def bench_fix(ctx: BenchContext):
+    repo = str(ctx.repo_dir())
+    matchers = [TemplateMatcher(t) for t in ctx.registry.ranked()]
+    matchers = [m for m in matchers if m.can_fix]
+    return lambda: [m.fix(repo) for m in matchers], REPO_FILES[ctx.tier]
+
+
+def bench_sarif(ctx: BenchContext):
+    """Findings/minute: parse a SARIF report and match each finding's snippet."""
+    sarif_file = ctx.workdir / f"findings-{ctx.tier}-{ctx.seed}.sarif"
+    if not sarif_file.exists():
+        with open(sarif_file, 'w') as f:
+            json.dump(generate_sarif(ctx.corpus_size, list(ctx.registry.templates.values()), ctx.seed), f)
+    matchers = {t['id']: TemplateMatcher(t) for t in ctx.registry.templates.values()}
+
+    def run():
+        with open(sarif_file, 'r') as f:
+            report = json.load(f)
+        matched = 0
+        for result in report['runs'][0]['results']:
+            location = result['locations'][0]['physicalLocation']
+            snippet = location['region']['snippet']['text']
+            matcher = matchers.get(result['ruleId'])
+            if matcher and matcher.scan_text(snippet, location['artifactLocation']['uri']):
+                matched += 1
+        return matched
+    return run, ctx.corpus_size
+
+
+def bench_lookup(ctx: BenchContext):
+    """Batched template lookup for every SARIF finding."""
+    from engine.lookup.index import PatternIndex, expand_sarif
+    from research.embeddings import EmbeddingEngine
+    index = PatternIndex(ctx.registry, engine=EmbeddingEngine('hashing', batch_size=1024))
+    queries = expand_sarif(generate_sarif(ctx.corpus_size, list(ctx.registry.templates.values()), ctx.seed))
+    return lambda: index.lookup(queries), len(queries)
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    'calibration': bench_calibration,
+    'collect': bench_collect,
+    'load': bench_load,
+    'embed': bench_embed,
+    'embed_int8': bench_embed_int8,
+    'cluster': bench_cluster,
+    'score': bench_score,
+    'scan': bench_scan,
+    'fix': bench_fix,
+    'sarif': bench_sarif,
+    'lookup': bench_lookup,
+}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _peak_rss_worker(ctx: BenchContext, name: str, conn):
+    run, _ = BENCHMARKS[name](ctx)
+    run()
+    conn.send(_peak_rss_mb())
+
+
+def measure_peak_rss(ctx: BenchContext, name: str) -> float:
+    """Peak RSS (MiB) of one benchmark's setup and run, in a forked process."""
+    context = multiprocessing.get_context('fork')
+    reader, writer = context.Pipe(duplex=False)
+    process = context.Process(target=_peak_rss_worker, args=(ctx, name, writer))
+    process.start()
+    writer.close()
+    try:
+        return reader.recv()
+    except EOFError:
+        raise RuntimeError(f"{name}: memory run exited with code {process.exitcode}") from None
+    finally:
+        process.join()
+
+
+def _seconds_per_run(run: Callable[[], object], min_seconds: float) -> float:
+    """Mean time of one call, over as many calls as fit in `min_seconds` (at least one)."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        run()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def run_benchmarks(
+    ctx: BenchContext,
+    names: List[str],
+    repeat: int = 5,
+    memory: bool = False,
+    min_seconds: float = MIN_SECONDS,
+) -> Dict[str, Dict]:
+    """
+    Run benchmarks, normalized by the calibration workload.
+
+    Each of the `repeat` rounds times the calibration workload right
+    before the benchmark, and `normalized` is the median of the per-round
+    ratios, so the host slowing down or speeding up mid-run (CPU frequency,
+    noisy neighbours) cancels out. Short benchmarks are called repeatedly
+    until they have run `min_seconds` in total. With `memory`, peak RSS is
+    measured first, before this process has built any benchmark inputs of
+    its own.
+    """
+    names = [n for n in names if n != 'calibration']
+    peaks = {}
+    if memory:
+        for name in ['calibration'] + names:
+            peaks[name] = measure_peak_rss(ctx, name)
+            logger.info(f"{name:12s} peak RSS {peaks[name]:9.1f} MiB")
+
+    calibrate, calibration_items = bench_calibration(ctx)
+    calibrations = []
+    results = {}
+    for name in names:
+        run, items = BENCHMARKS[name](ctx)
+        timings, ratios = [], []
+        for _ in range(repeat):
+            reference = _seconds_per_run(calibrate, 0)
+            seconds = _seconds_per_run(run, min_seconds / repeat)
+            calibrations.append(reference)
+            timings.append(seconds)
+            ratios.append(seconds / reference)
+        seconds = min(timings)
+        results[name] = {
+            'seconds': seconds,
+            'items': items,
+            'items_per_second': items / seconds if seconds else None,
+            'normalized': statistics.median(ratios),
+        }
+        logger.info(f"{name:12s} {seconds:9.4f}s  {items:>9} items")
+
+    if not calibrations:
+        calibrations = [_seconds_per_run(calibrate, 0) for _ in range(repeat)]
+    results = {'calibration': {
+        'seconds': min(calibrations),
+        'items': calibration_items,
+        'items_per_second': calibration_items / min(calibrations),
+        'normalized': 1.0,
+    }, **results}
+    if memory:
+        for name, result in results.items():
+            result['peak_rss_mb'] = round(peaks[name], 1)
+    return results
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float
+) -> List[str]:
+    """
+    Benchmarks slower than baseline by more than `threshold` (fraction).
+
+    A baseline entry may carry its own `threshold` for benchmarks that are
+    inherently noisier (e.g. I/O through a local server).
+    """
+    regressions = []
+    for name, result in results.items():
+        if name == 'calibration' or name not in baseline:
+            continue
+        expected = baseline[name]['normalized']
+        if result['normalized'] > expected * (1 + baseline[name].get('threshold', threshold)):
+            regressions.append(
+                f"{name}: {result['normalized']:.3f} vs baseline {expected:.3f} "
+                f"(+{(result['normalized'] / expected - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def _load_baseline(path: Path) -> Dict:
+    if not path.exists():
+        return {'threshold': DEFAULT_THRESHOLD, 'tiers': {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run offline benchmarks.")
+    parser.add_argument('--tier', choices=sorted(CORPUS_SIZES), default='small')
+    parser.add_argument('--only', help='Comma-separated benchmarks (default: all)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='Calibrated rounds per benchmark')
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS,
+                        help='Repeat short benchmarks until they have run this long')
+    parser.add_argument('--templates', default='templates')
+    parser.add_argument('--workdir', default='data/bench')
+    parser.add_argument('--baseline', default=str(BASELINE_FILE))
+    parser.add_argument('--threshold', type=float, help='Allowed slowdown, e.g. 0.25 = 25%%')
+    parser.add_argument('--memory', action='store_true', help='Also measure peak RSS per benchmark')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', help='Write results JSON here')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    ctx = BenchContext(args.tier, args.seed, workdir, TemplateRegistry.from_directory(args.templates))
+    results = run_benchmarks(ctx, names, args.repeat, args.memory, args.min_seconds)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'tier': args.tier, 'seed': args.seed, 'results': results}, f, indent=2)
+
+    baseline_path = Path(args.baseline)
+    baseline = _load_baseline(baseline_path)
+    tier_baseline = baseline['tiers'].setdefault(args.tier, {})
+
+    if args.update_baseline:
+        for name, result in results.items():
+            if name != 'calibration':
+                tier_baseline[name] = {
+                    **tier_baseline.get(name, {}), 'normalized': round(result['normalized'], 4),
+                }
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        logger.info(f"Baseline updated: {baseline_path}")
+        return 0
+
+    threshold = args.threshold if args.threshold is not None else baseline.get('threshold', DEFAULT_THRESHOLD)
+    missing = [n for n in results if n != 'calibration' and n not in tier_baseline]
+    if missing:
+        logger.info(f"No baseline for: {', '.join(missing)}")
+    regressions = compare_to_baseline(results, tier_baseline, threshold)
+    for regression in regressions:
+        logger.error(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
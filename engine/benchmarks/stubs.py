@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Offline stand-in for the GitHub API.
+
+The deterministic embedder lives in `research.embeddings.HashingModel`.
+"""
+
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+
+def _to_api_pr(pr: Dict) -> Dict:
+    """PRMetadata-style dict -> GitHub REST `pull` payload."""
+    return {
+        'number': pr['pr_number'],
+        'title': pr['title'],
+        'body': pr['body'],
+        'created_at': pr['created_at'],
+        'merged_at': pr['merged_at'],
+        'closed_at': pr['closed_at'],
+        'user': {'login': pr['author']},
+        'changed_files': pr['files_changed'],
+        'additions': pr['additions'],
+        'deletions': pr['deletions'],
+        'comments': pr['comments'],
+        'review_comments': pr['review_comments'],
+        'commits': pr['commits'],
+        'labels': [{'name': label} for label in pr['labels']],
+        'merged': pr['merged'],
+    }
+
+
+class FakeGitHubServer:
+    """
+    Serve a synthetic PR corpus over the subset of the GitHub REST API the
+    collector uses: PR list, PR detail and issue search (for reverts).
+
+    Usage:
+        with FakeGitHubServer(prs) as server:
+            github_collector.GITHUB_API_BASE = server.url
+    """
+
+    def __init__(self, prs: List[Dict]):
+        self.prs: Dict[str, Dict[int, Dict]] = {}
+        for pr in prs:
+            self.prs.setdefault(f"{pr['owner']}/{pr['repo']}", {})[pr['pr_number']] = pr
+        self.request_count = 0
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                fake.request_count += 1
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+
+                m = re.fullmatch(r'/repos/([^/]+)/([^/]+)/pulls', url.path)
+                if m:
+                    prs = fake.prs.get(f"{m.group(1)}/{m.group(2)}", {})
+                    page = int(query.get('page', ['1'])[0])
+                    per_page = int(query.get('per_page', ['30'])[0])
+                    numbers = sorted(prs, reverse=True)[(page - 1) * per_page:page * per_page]
+                    return self._send(200, [{'number': n} for n in numbers])
+
+                m = re.fullmatch(r'/repos/([^/]+)/([^/]+)/pulls/(\d+)', url.path)
+                if m:
+                    pr = fake.prs.get(f"{m.group(1)}/{m.group(2)}", {}).get(int(m.group(3)))
+                    if pr is None:
+                        return self._send(404, {'message': 'Not Found'})
+                    return self._send(200, _to_api_pr(pr))
+
+                if url.path == '/search/issues':
+                    q = query.get('q', [''])[0]
+                    m = re.search(r'repo:([^/\s]+)/(\S+)\s.*#(\d+)', q)
+                    items = []
+                    if m:
+                        pr = fake.prs.get(f"{m.group(1)}/{m.group(2)}", {}).get(int(m.group(3)))
+                        if pr and pr['has_revert']:
+                            merged = datetime.fromisoformat(pr['merged_at'].replace('Z', '+00:00'))
+                            reverted = merged + timedelta(hours=pr['revert_time_hours'])
+                            items.append({
+                                'title': f"Revert \"{pr['title']}\"",
+                                'merged_at': reverted.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                            })
+                    return self._send(200, {'total_count': len(items), 'items': items})
+
+                return self._send(404, {'message': 'Not Found'})
+
+        return Handler
+
+    def start(self) -> 'FakeGitHubServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeGitHubServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -3,10 +3,27 @@
 
 import click
 
+from research.instrumentation import metrics, profile
+
 @click.group()
-def cli():
+@click.option('--metrics-out', default=None, help='Write a JSON run report here')
+@click.option('--prometheus-out', default=None, help='Write Prometheus text metrics here')
+@click.option('--profile', 'profile_dir', default=None, help='Dump cProfile data per stage here')
+@click.pass_context
+def cli(ctx, metrics_out: str, prometheus_out: str, profile_dir: str):
     """Evolutionary Remediation Engine CLI."""
-    pass
+    ctx.obj = {'profile_dir': profile_dir}
+    if metrics_out or prometheus_out:
+        metrics.enable()
+
+        def write_reports():
+            if metrics_out:
+                metrics.write_json(metrics_out, {'command': ctx.invoked_subcommand})
+            if prometheus_out:
+                metrics.write_prometheus(prometheus_out)
+
+        ctx.call_on_close(write_reports)
+    ctx.with_resource(profile(f"cli-{ctx.invoked_subcommand}", profile_dir))
 
 @cli.command()
 @click.option('--repo', required=True)
@@ -20,5 +37,92 @@ def fix(repo: str):
     """Generate fixes."""
     click.echo(f"Generating fixes for {repo}...")
 
+@cli.command()
+@click.option('--manifest', required=True, help='YAML list of repositories')
+@click.option('--templates', 'template_dir', default='templates')
+@click.option('--state-file', default='data/fleet_state.json')
+@click.option('--output-dir', default='data/fleet')
+@click.option('--workers', type=int, default=None, help='Defaults to CPU count')
+@click.option('--fresh', is_flag=True, help='Ignore saved state and rerun every job')
+@click.pass_context
+def fleet(ctx, manifest: str, template_dir: str, state_file: str, output_dir: str, workers: int,
+          fresh: bool):
+    """Remediate a fleet of repositories (resumable)."""
+    from engine.fleet.scheduler import FleetScheduler, load_manifest
+    from engine.templates import TemplateRegistry
+
+    scheduler = FleetScheduler(
+        repos=load_manifest(manifest),
+        registry=TemplateRegistry.from_directory(template_dir),
+        state_file=state_file,
+        output_dir=output_dir,
+        max_workers=workers,
+        profile_dir=ctx.obj['profile_dir'],
+        fresh=fresh,
+    )
+    summary = scheduler.run()
+    click.echo(", ".join(f"{status}={count}" for status, count in sorted(summary.items())))
+
+@cli.command()
+@click.option('--templates', 'template_dir', default='templates')
+@click.option('--patterns', 'patterns_file', default='data/scored_patterns.json',
+              help='Scored pattern library with cluster centroids')
+@click.option('--model', default='all-MiniLM-L6-v2',
+              help='Embedding model the patterns were built with ("hashing" for the offline stub)')
+@click.option('--host', default='127.0.0.1')
+@click.option('--port', type=int, default=8765)
+@click.option('--socket', 'socket_path', default=None, help='Listen on this Unix socket instead of TCP')
+@click.option('--feedback-state', default=None,
+              help='Enable outcome feedback, persisting aggregates here')
+@click.option('--event-log', default=None, help='JSONL outcome event log to tail (with --feedback-state)')
+@click.option('--webhook-secret', envvar='GITHUB_WEBHOOK_SECRET', default=None,
+              help='Verify GitHub webhook signatures')
+def serve(template_dir: str, patterns_file: str, model: str, host: str, port: int, socket_path: str,
+          feedback_state: str, event_log: str, webhook_secret: str):
+    """Serve template lookups for findings, snippets and diffs."""
+    from engine.feedback.sources import EventLog
+    from engine.feedback.store import FeedbackStore
+    from engine.lookup.index import PatternIndex
+    from engine.lookup.server import LookupServer
+    from engine.templates import TemplateRegistry
+    from research.embeddings import EmbeddingEngine
+
+    index = PatternIndex.load(template_dir, patterns_file, EmbeddingEngine(model))
+    feedback = None
+    if feedback_state:
+        feedback = FeedbackStore(TemplateRegistry(index.templates), feedback_state)
+    server = LookupServer(
+        index, host=host, port=port, socket_path=socket_path, feedback=feedback,
+        event_log=EventLog(event_log) if event_log and feedback else None,
+        webhook_secret=webhook_secret,
+    )
+    click.echo(f"Serving {len(index.templates)} templates on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+@cli.command()
+@click.option('--templates', 'template_dir', default='templates')
+@click.option('--event-log', required=True, help='JSONL outcome event log')
+@click.option('--state-file', default='data/feedback_state.json')
+@click.option('--report', 'report_file', default=None, help='Write per-template evidence and scores here')
+def ingest(template_dir: str, event_log: str, state_file: str, report_file: str):
+    """Fold new merge outcomes into template confidence."""
+    import json
+
+    from engine.feedback.sources import EventLog
+    from engine.feedback.store import FeedbackStore
+    from engine.templates import TemplateRegistry
+
+    store = FeedbackStore(TemplateRegistry.from_directory(template_dir), state_file)
+    updated = store.ingest_log(EventLog(event_log))
+    store.save()
+    for template_id, scores in sorted(updated.items()):
+        click.echo(f"{template_id}: confidence={scores['overall_confidence']:.3f}")
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(store.report(), f, indent=2)
+
 if __name__ == '__main__':
     cli()
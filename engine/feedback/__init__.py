@@ -0,0 +1 @@
+"""Merge-outcome feedback: streaming evidence updates and incremental re-scoring."""
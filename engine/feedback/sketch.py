@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+P² streaming quantile estimator (Jain & Chlamtac, 1985).
+
+Tracks one quantile with five markers: constant memory and O(1) work per
+observation, no stored samples. Exact for the first five observations.
+"""
+
+import math
+from typing import Dict, List
+
+
+class P2Quantile:
+    """Running estimate of the `p` quantile of a stream."""
+
+    __slots__ = ('p', 'count', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, p: float = 0.5):
+        if not 0 < p < 1:
+            raise ValueError(f"Quantile must be in (0, 1), got {p}")
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.desired = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float):
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = math.copysign(1.0, d)
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = self._linear(i, d)
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i: int, d: float) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: float) -> float:
+        q, n = self.heights, self.positions
+        j = i + int(d)
+        return q[i] + d * (q[j] - q[i]) / (n[j] - n[i])
+
+    @property
+    def value(self) -> float:
+        """Current estimate (NaN before the first observation)."""
+        if not self.count:
+            return math.nan
+        if self.count <= 5:
+            # Nearest-rank quantile of the few values seen so far
+            return self.heights[min(len(self.heights) - 1, int(self.p * len(self.heights)))]
+        return self.heights[2]
+
+    def to_dict(self) -> Dict:
+        return {
+            'p': self.p, 'count': self.count, 'heights': list(self.heights),
+            'positions': list(self.positions), 'desired': list(self.desired),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'P2Quantile':
+        sketch = cls(data['p'])
+        sketch.count = data['count']
+        sketch.heights = list(data['heights'])
+        sketch.positions = list(data['positions'])
+        sketch.desired = list(data['desired'])
+        return sketch
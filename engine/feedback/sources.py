@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Outcome event sources: a local JSONL event log and GitHub webhooks.
+
+The event log is the offline stand-in for the webhook: any process can
+append one event per line, and `EventLog.read_new()` returns only lines
+added since the last offset the store recorded.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from engine.feedback.store import CLOSED, MERGED, REVERTED
+from engine.fleet.stages import TEMPLATE_MARKER
+
+logger = logging.getLogger(__name__)
+
+# Finds the marker fleet PR drafts embed in their body
+MARKER_PATTERN = re.compile(
+    re.escape(TEMPLATE_MARKER).replace(re.escape('{template_id}'), r'(\S+)')
+)
+
+# GitHub's "Revert" button writes "Reverts owner/repo#123" in the PR body
+REVERTS_PR = re.compile(r'^Reverts ([\w.-]+/[\w.-]+)#(\d+)', re.MULTILINE)
+
+
+class EventLog:
+    """Tail a JSONL file of outcome events from a byte offset."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def read_new(self, offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Complete lines after `offset`.
+
+        Returns:
+            (events, new_offset); a partially written last line is left
+            for the next call
+        """
+        if not self.path.exists():
+            return [], offset
+        with open(self.path, 'rb') as f:
+            if f.seek(0, 2) < offset:
+                logger.warning(f"{self.path} shrank; reading from the start")
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        events = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed event in {self.path}: {line[:80]!r}")
+        return events, offset + end
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check GitHub's `X-Hub-Signature-256` header."""
+    if not signature or not signature.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len('sha256='):])
+
+
+def _hours_between(start: str, end: str) -> float:
+    start_time = datetime.fromisoformat(start.replace('Z', '+00:00'))
+    end_time = datetime.fromisoformat(end.replace('Z', '+00:00'))
+    return (end_time - start_time).total_seconds() / 3600
+
+
+def events_from_github(payload: Dict) -> List[Dict]:
+    """
+    Outcome events in a GitHub `pull_request` webhook payload.
+
+    Only `closed` actions matter. A merged PR carrying a template marker
+    is a merge (or, if unmerged, a rejection) of that template; a merged
+    PR created with GitHub's revert button is a revert of the PR it names.
+    """
+    if payload.get('action') != 'closed' or 'pull_request' not in payload:
+        return []
+    pr = payload['pull_request']
+    repo = payload['repository']['full_name']
+    body = pr.get('body') or ''
+    events = []
+
+    marker = MARKER_PATTERN.search(body)
+    if marker:
+        template_id = marker.group(1)
+        if pr.get('merged'):
+            events.append({
+                'type': MERGED,
+                'template_id': template_id,
+                'repo': repo,
+                'pr_number': pr['number'],
+                'merge_time_hours': _hours_between(pr['created_at'], pr['merged_at']),
+                'discussion_density': pr.get('review_comments', 0) / max(
+                    pr.get('additions', 0) + pr.get('deletions', 0), 1
+                ),
+            })
+        else:
+            events.append({
+                'type': CLOSED, 'template_id': template_id, 'repo': repo, 'pr_number': pr['number'],
+            })
+
+    if pr.get('merged'):
+        for reverted_repo, number in REVERTS_PR.findall(body):
+            events.append({'type': REVERTED, 'repo': reverted_repo, 'pr_number': int(number)})
+    return events
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Per-template outcome aggregates and incremental re-scoring.
+
+Events (one JSON object each, from the event log or a webhook):
+
+    {"type": "merged", "template_id": "SECRETS_001", "repo": "org/app",
+     "pr_number": 12, "merge_time_hours": 3.5, "discussion_density": 0.02}
+    {"type": "closed", "template_id": "SECRETS_001", "repo": "org/app", "pr_number": 13}
+    {"type": "reverted", "repo": "org/app", "pr_number": 12}
+
+A revert names the original PR; its template is looked up from the merge
+that was recorded for that PR (or given explicitly as `template_id`).
+
+Each event updates one template's counters and P² median sketches in O(1)
+and marks the template dirty. `rescore()` then runs `ConfidenceScorer` on
+the dirty templates only. Template YAML evidence is the prior: live
+counts are added to it, and live medians are blended with the prior
+median, weighted by count. Rejected (closed) PRs count as failures
+alongside reverts in the stability term.
+
+Redelivered events are recognized by "repo#number". Only the most recent
+`max_tracked_prs` PRs per outcome are remembered, so state stays bounded;
+a revert of a PR that has aged out needs an explicit `template_id`.
+"""
+
+import json
+import logging
+import math
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from engine.feedback.sketch import P2Quantile
+from engine.templates import TemplateRegistry
+from research.instrumentation import metrics
+from research.scoring.confidence_scorer import ConfidenceScorer
+
+logger = logging.getLogger(__name__)
+
+MERGED = 'merged'
+CLOSED = 'closed'
+REVERTED = 'reverted'
+EVENT_TYPES = (MERGED, CLOSED, REVERTED)
+
+# PRs remembered per outcome for deduplication and revert attribution
+MAX_TRACKED_PRS = 50_000
+
+
+# Optional numeric fields of a merged event
+NUMERIC_FIELDS = ('merge_time_hours', 'discussion_density')
+
+
+def validate_event(event) -> None:
+    """
+    Raise ValueError unless `event` has a known type, a repo and a PR number.
+
+    Optional fields must have the right type when present: `template_id`
+    a string, the numeric fields a finite number.
+    """
+    if not isinstance(event, dict):
+        raise ValueError(f"Event is not an object: {event!r}")
+    kind = event.get('type')
+    if kind not in EVENT_TYPES:
+        raise ValueError(f"Unknown event type: {kind!r}")
+    if not isinstance(event.get('repo'), str) or not event['repo']:
+        raise ValueError(f"{kind} event without a repo")
+    if not isinstance(event.get('pr_number'), int) or isinstance(event['pr_number'], bool):
+        raise ValueError(f"{kind} event without an integer pr_number")
+    template_id = event.get('template_id')
+    if template_id is not None and not isinstance(template_id, str):
+        raise ValueError(f"{kind} event with a non-string template_id: {template_id!r}")
+    for name in NUMERIC_FIELDS:
+        value = event.get(name)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{kind} event with a non-numeric {name}: {value!r}")
+
+
+def _blend(prior: float, prior_count: int, live: P2Quantile) -> float:
+    """Count-weighted mix of the prior median and the live estimate."""
+    if not live.count:
+        return prior
+    total = prior_count + live.count
+    return (prior * prior_count + live.value * live.count) / total
+
+
+class TemplateOutcomes:
+    """Prior evidence plus live outcome aggregates for one template."""
+
+    __slots__ = ('prior', 'merged', 'closed', 'reverted', 'repos', 'merge_hours', 'discussion')
+
+    def __init__(self, prior: Dict):
+        self.prior = {
+            'occurrence_count': int(prior.get('occurrence_count', 0)),
+            'repo_count': int(prior.get('repo_count', 0)),
+            'median_merge_hours': float(prior.get('median_merge_hours', 0.0)),
+            'median_discussion_density': float(prior.get('median_discussion_density', 0.0)),
+            'revert_rate': float(prior.get('revert_rate', 0.0)),
+        }
+        self.merged = 0
+        self.closed = 0
+        self.reverted = 0
+        self.repos: Set[str] = set()
+        self.merge_hours = P2Quantile(0.5)
+        self.discussion = P2Quantile(0.5)
+
+    def record_merge(self, repo: str, merge_time_hours: Optional[float],
+                     discussion_density: Optional[float]):
+        self.merged += 1
+        self.repos.add(repo)
+        if merge_time_hours is not None:
+            self.merge_hours.add(merge_time_hours)
+        if discussion_density is not None:
+            self.discussion.add(discussion_density)
+
+    def evidence(self) -> Dict:
+        """
+        Evidence in the shape `ConfidenceScorer` expects.
+
+        `revert_rate` is the failure rate: reverted merges plus rejected
+        PRs, over merged plus rejected PRs.
+        """
+        prior = self.prior
+        occurrences = prior['occurrence_count'] + self.merged
+        prior_reverts = prior['revert_rate'] * prior['occurrence_count']
+        failures = prior_reverts + self.reverted + self.closed
+        return {
+            'occurrence_count': occurrences,
+            # Prior repos are unknown by name; new repos are assumed distinct
+            'repo_count': prior['repo_count'] + len(self.repos),
+            'median_merge_hours': _blend(
+                prior['median_merge_hours'], prior['occurrence_count'], self.merge_hours
+            ),
+            'median_discussion_density': _blend(
+                prior['median_discussion_density'], prior['occurrence_count'], self.discussion
+            ),
+            'revert_rate': failures / max(occurrences + self.closed, 1),
+        }
+
+    def live(self) -> Dict:
+        """Outcome counts observed since ingestion started."""
+        decided = self.merged + self.closed
+        return {
+            'merged': self.merged,
+            'closed': self.closed,
+            'reverted': self.reverted,
+            'repos': len(self.repos),
+            'merge_rate': self.merged / decided if decided else None,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'merged': self.merged, 'closed': self.closed,
+            'reverted': self.reverted, 'repos': sorted(self.repos),
+            'merge_hours': self.merge_hours.to_dict(), 'discussion': self.discussion.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, prior: Dict, data: Dict) -> 'TemplateOutcomes':
+        outcomes = cls(prior)
+        outcomes.merged = data['merged']
+        outcomes.closed = data['closed']
+        outcomes.reverted = data['reverted']
+        outcomes.repos = set(data['repos'])
+        outcomes.merge_hours = P2Quantile.from_dict(data['merge_hours'])
+        outcomes.discussion = P2Quantile.from_dict(data['discussion'])
+        return outcomes
+
+
+class FeedbackStore:
+    """
+    Outcome aggregates for every template, persisted as JSON.
+
+    `apply()` is O(1) per event; `rescore()` costs one `ConfidenceScorer`
+    call per template touched since the last rescore.
+    """
+
+    def __init__(
+        self,
+        registry: TemplateRegistry,
+        state_file: Optional[str] = None,
+        weights: Optional[Dict[str, float]] = None,
+        max_tracked_prs: int = MAX_TRACKED_PRS,
+    ):
+        self.state_file = Path(state_file) if state_file else None
+        self.weights = weights
+        self.max_tracked_prs = max_tracked_prs
+        self.priors = {
+            template_id: template.get('evidence') or {}
+            for template_id, template in registry.templates.items()
+        }
+        self.templates: Dict[str, TemplateOutcomes] = {
+            template_id: TemplateOutcomes(prior) for template_id, prior in self.priors.items()
+        }
+        # "repo#number" -> template id for merged PRs, so reverts can be
+        # attributed; oldest first, so the oldest PRs are forgotten first
+        self.merged_prs: 'OrderedDict[str, str]' = OrderedDict()
+        self.closed_prs: 'OrderedDict[str, None]' = OrderedDict()
+        self.reverted_prs: 'OrderedDict[str, None]' = OrderedDict()
+        self.offsets: Dict[str, int] = {}
+        self.dirty: Set[str] = set()
+        self.unsaved = False
+        self.scores: Dict[str, Dict[str, float]] = {}
+        if self.state_file and self.state_file.exists():
+            self._load()
+        # Start from fully scored templates; later rescores are incremental
+        self.dirty.update(self.templates)
+        self.rescore()
+
+    def _load(self):
+        with open(self.state_file, 'r') as f:
+            state = json.load(f)
+        # Live aggregates are restored; priors always come from the current templates
+        for template_id, data in state['templates'].items():
+            if template_id in self.templates:
+                self.templates[template_id] = TemplateOutcomes.from_dict(self.priors[template_id], data)
+        for key, template_id in state.get('merged_prs', {}).items():
+            self._remember(self.merged_prs, key, template_id)
+        for key in state.get('closed_prs', []):
+            self._remember(self.closed_prs, key)
+        for key in state.get('reverted_prs', []):
+            self._remember(self.reverted_prs, key)
+        self.offsets = state.get('offsets', {})
+        logger.info(f"Loaded feedback state from {self.state_file}")
+
+    def save(self):
+        """Write state atomically."""
+        if self.state_file is None:
+            return
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'templates': {tid: outcomes.to_dict() for tid, outcomes in self.templates.items()},
+            'merged_prs': self.merged_prs,
+            'closed_prs': list(self.closed_prs),
+            'reverted_prs': list(self.reverted_prs),
+            'offsets': self.offsets,
+        }
+        tmp = self.state_file.with_suffix(self.state_file.suffix + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+        self.unsaved = False
+
+    def _remember(self, tracked: 'OrderedDict', key: str, value: Optional[str] = None):
+        tracked[key] = value
+        if len(tracked) > self.max_tracked_prs:
+            tracked.popitem(last=False)
+
+    def apply(self, event: Dict) -> Optional[str]:
+        """
+        Fold one outcome event into its template's aggregates.
+
+        Returns:
+            The affected template id, or None if the event was ignored
+
+        Raises:
+            ValueError: If the event is malformed (see `validate_event`)
+        """
+        validate_event(event)
+        kind = event['type']
+        key = f"{event['repo']}#{event['pr_number']}"
+        template_id = event.get('template_id')
+        if kind == REVERTED:
+            template_id = template_id or self.merged_prs.get(key)
+        outcomes = self.templates.get(template_id)
+        if outcomes is None:
+            metrics.inc('feedback_events_ignored_total', type=kind)
+            logger.debug(f"Ignoring {kind} event for {key}: unknown template {template_id!r}")
+            return None
+
+        if kind == MERGED:
+            if key in self.merged_prs:
+                return None  # Redelivered webhook
+            self._remember(self.merged_prs, key, template_id)
+            outcomes.record_merge(
+                event['repo'], event.get('merge_time_hours'), event.get('discussion_density')
+            )
+        elif kind == CLOSED:
+            if key in self.closed_prs:
+                return None
+            self._remember(self.closed_prs, key)
+            outcomes.closed += 1
+        else:
+            if key in self.reverted_prs:
+                return None
+            self._remember(self.reverted_prs, key)
+            outcomes.reverted += 1
+
+        metrics.inc('feedback_events_total', type=kind)
+        self.dirty.add(template_id)
+        self.unsaved = True
+        return template_id
+
+    def rescore(self) -> Dict[str, Dict[str, float]]:
+        """Re-score dirty templates; returns their new scores."""
+        updated = {}
+        for template_id in self.dirty:
+            evidence = self.templates[template_id].evidence()
+            scores = ConfidenceScorer.component_scores(evidence)
+            scores['overall_confidence'] = ConfidenceScorer.score_pattern(
+                {'evidence': evidence}, self.weights
+            )
+            self.scores[template_id] = updated[template_id] = scores
+        metrics.inc('feedback_templates_rescored_total', len(updated))
+        self.dirty.clear()
+        return updated
+
+    def ingest(self, events: List[Dict]) -> Dict[str, Dict[str, float]]:
+        """
+        Apply a batch of events and re-score the templates they touched.
+
+        Malformed events are logged and skipped; the rest of the batch is
+        still applied.
+        """
+        for event in events:
+            try:
+                self.apply(event)
+            except ValueError as e:
+                metrics.inc('feedback_events_invalid_total')
+                logger.warning(f"Skipping invalid event {str(event)[:80]}: {e}")
+        return self.rescore()
+
+    def ingest_log(self, log) -> Dict[str, Dict[str, float]]:
+        """Apply events appended to an `EventLog` since its recorded offset."""
+        key = str(log.path)
+        start = self.offsets.get(key, 0)
+        events, offset = log.read_new(start)
+        updated = self.ingest(events)
+        # Only advance past lines whose events have been applied
+        if offset != start:
+            self.offsets[key] = offset
+            self.unsaved = True
+        return updated
+
+    def report(self) -> Dict[str, Dict]:
+        """Evidence, live counts and scores per template."""
+        return {
+            template_id: {
+                'evidence': outcomes.evidence(),
+                'live': outcomes.live(),
+                'confidence_scores': self.scores[template_id],
+            }
+            for template_id, outcomes in sorted(self.templates.items())
+        }
@@ -0,0 +1 @@
+"""Fleet-wide remediation across many repositories."""
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Fleet remediation scheduler.
+
+Schedules scan -> fix -> validate -> pr jobs for many repositories across a
+process pool. Jobs are prioritized by template risk tier and confidence,
+each repository has its own concurrency limit, and job state is persisted
+after every stage so an interrupted run resumes where it stopped.
+
+Jobs remember the checkout's HEAD sha; once a repository moves to a new
+commit its jobs start over, so a later run rescans it. Checkouts that are
+not git repositories (or uncommitted changes) need `fresh=True`.
+"""
+
+import heapq
+import json
+import logging
+import os
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+from engine.fleet.stages import STAGES, ValidationError, init_worker, run_stage
+from engine.templates import TemplateRegistry, template_priority
+from research.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass
+class RepoSpec:
+    """A repository entry from the fleet manifest."""
+    name: str
+    path: str
+    max_concurrency: int = 1
+    templates: Optional[List[str]] = None
+
+
+@dataclass
+class FleetJob:
+    """Remediation of one template in one repository."""
+    job_id: str
+    repo: str
+    path: str
+    template_id: str
+    template_path: str
+    priority: float
+    stage: str = STAGES[0]
+    status: str = PENDING
+    attempts: int = 0
+    context: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+    revision: Optional[str] = None
+
+
+def repo_revision(path: str) -> Optional[str]:
+    """HEAD sha of a checkout, or None if it is not a git repository."""
+    try:
+        result = subprocess.run(
+            ['git', '-C', path, 'rev-parse', 'HEAD'], capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def load_manifest(manifest_file: str) -> List[RepoSpec]:
+    """
+    Load a fleet manifest.
+
+    Format:
+        defaults:
+          max_concurrency: 2
+        repos:
+          - name: org/service
+            path: /srv/checkouts/service
+            templates: [SECRETS_001]
+          - /srv/checkouts/other     # name defaults to the directory name
+
+    Raises:
+        ValueError: If two repos share a name or a concurrency limit is below 1
+    """
+    with open(manifest_file, 'r') as f:
+        manifest = yaml.safe_load(f) or {}
+
+    defaults = manifest.get('defaults', {})
+    repos = []
+    paths_by_name: Dict[str, str] = {}
+    for entry in manifest.get('repos', []):
+        if isinstance(entry, str):
+            entry = {'path': entry}
+        repo = RepoSpec(
+            name=entry.get('name') or Path(entry['path']).name,
+            path=entry['path'],
+            max_concurrency=entry.get('max_concurrency', defaults.get('max_concurrency', 1)),
+            templates=entry.get('templates', defaults.get('templates')),
+        )
+        if repo.name in paths_by_name:
+            raise ValueError(
+                f"{manifest_file}: repo name {repo.name!r} is used by both "
+                f"{paths_by_name[repo.name]} and {repo.path}; give one an explicit name"
+            )
+        if not isinstance(repo.max_concurrency, int) or repo.max_concurrency < 1:
+            raise ValueError(
+                f"{manifest_file}: {repo.name}: max_concurrency must be at least 1, "
+                f"got {repo.max_concurrency!r}"
+            )
+        paths_by_name[repo.name] = repo.path
+        repos.append(repo)
+    return repos
+
+
+class JobStore:
+    """JSON-file persistence for fleet job state."""
+
+    def __init__(self, state_file: str):
+        self.state_file = Path(state_file)
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def load(self) -> Dict[str, FleetJob]:
+        if not self.state_file.exists():
+            return {}
+        with open(self.state_file, 'r') as f:
+            data = json.load(f)
+        return {job['job_id']: FleetJob(**job) for job in data.get('jobs', [])}
+
+    def save(self, jobs: Dict[str, FleetJob]):
+        """Atomically replace the state file."""
+        tmp_file = self.state_file.with_suffix(self.state_file.suffix + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({'jobs': [asdict(job) for job in jobs.values()]}, f)
+        os.replace(tmp_file, self.state_file)
+
+
+class FleetScheduler:
+    """Run remediation jobs for a fleet of repositories."""
+
+    def __init__(
+        self,
+        repos: List[RepoSpec],
+        registry: TemplateRegistry,
+        state_file: str = "data/fleet_state.json",
+        output_dir: str = "data/fleet",
+        max_workers: Optional[int] = None,
+        max_attempts: int = 2,
+        stage_runner: Callable[[Dict, str, Optional[str]], Dict] = run_stage,
+        profile_dir: Optional[str] = None,
+        fresh: bool = False,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            repos: Repositories from the fleet manifest
+            registry: Templates to apply
+            state_file: Where job state is persisted between runs
+            output_dir: Where patches and PR drafts are written
+            max_workers: Process pool size (defaults to CPU count)
+            max_attempts: Attempts per job before it is marked failed
+            stage_runner: Picklable callable run in workers for each stage
+            profile_dir: If set, every stage dumps a cProfile there
+            fresh: Ignore persisted state and run every job from the start
+        """
+        self.repos = {repo.name: repo for repo in repos}
+        self.registry = registry
+        self.store = JobStore(state_file)
+        self.output_dir = output_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_attempts = max_attempts
+        self.stage_runner = stage_runner
+        self.profile_dir = profile_dir
+        self.fresh = fresh
+        self.jobs: Dict[str, FleetJob] = {}
+
+    def plan(self) -> Dict[str, FleetJob]:
+        """Build the job list, resuming persisted jobs for unchanged checkouts."""
+        persisted = {} if self.fresh else self.store.load()
+        jobs = {}
+        resumed = 0
+        for repo in self.repos.values():
+            revision = repo_revision(repo.path)
+            for template in self.registry.ranked(repo.templates):
+                job_id = f"{repo.name}:{template['id']}"
+                job = persisted.get(job_id)
+                if job is not None and job.revision != revision:
+                    logger.info(f"{job_id}: checkout moved to {revision}; starting over")
+                    job = None
+                if job is None:
+                    job = FleetJob(
+                        job_id=job_id,
+                        repo=repo.name,
+                        path=repo.path,
+                        template_id=template['id'],
+                        template_path=template['_path'],
+                        priority=template_priority(template),
+                        revision=revision,
+                    )
+                elif job.status == RUNNING:
+                    # Interrupted mid-stage: rerun that stage
+                    job.status = PENDING
+                elif job.status == FAILED and job.attempts < self.max_attempts:
+                    job.status = PENDING
+                elif job.status == DONE:
+                    resumed += 1
+                jobs[job_id] = job
+        self.jobs = jobs
+        logger.info(f"Planned {len(jobs)} jobs ({resumed} already done)")
+        return jobs
+
+    def _complete(self, job: FleetJob, result: Dict):
+        """Record a finished stage and advance the job."""
+        metrics.merge(result.pop('_metrics', {}))
+        finished = result.pop('finished', False)
+        job.context.update(result)
+        job.attempts = 0
+        job.error = None
+        next_index = STAGES.index(job.stage) + 1
+        if finished or next_index == len(STAGES):
+            job.status = DONE
+        else:
+            job.stage = STAGES[next_index]
+            job.status = PENDING
+
+    def _fail(self, job: FleetJob, error: BaseException):
+        job.attempts += 1
+        if isinstance(error, ValidationError):
+            # Rerunning the same fix gives the same result
+            job.attempts = max(job.attempts, self.max_attempts)
+        job.error = f"{type(error).__name__}: {error}"
+        job.status = PENDING if job.attempts < self.max_attempts else FAILED
+        logger.warning(f"{job.job_id} [{job.stage}] failed: {job.error}")
+
+    def run(self) -> Dict[str, int]:
+        """
+        Run all pending jobs to completion.
+
+        Returns:
+            Count of jobs per final status
+        """
+        if not self.jobs:
+            self.plan()
+
+        queue = []
+        seq = 0
+        for job in self.jobs.values():
+            if job.status == PENDING:
+                heapq.heappush(queue, (-job.priority, seq, job.job_id))
+                seq += 1
+
+        in_flight = {name: 0 for name in self.repos}
+        running = {}
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=init_worker,
+            initargs=(metrics.enabled,),
+        ) as executor:
+            while queue or running:
+                deferred = []
+                while queue and len(running) < self.max_workers:
+                    item = heapq.heappop(queue)
+                    job = self.jobs[item[2]]
+                    if in_flight[job.repo] >= self.repos[job.repo].max_concurrency:
+                        deferred.append(item)
+                        continue
+                    job.status = RUNNING
+                    in_flight[job.repo] += 1
+                    future = executor.submit(
+                        self.stage_runner, asdict(job), self.output_dir, self.profile_dir
+                    )
+                    running[future] = job.job_id
+                for item in deferred:
+                    heapq.heappush(queue, item)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = self.jobs[running.pop(future)]
+                    in_flight[job.repo] -= 1
+                    try:
+                        self._complete(job, future.result())
+                    except Exception as e:
+                        self._fail(job, e)
+                    metrics.inc('fleet_jobs_total', stage=job.stage, status=job.status)
+                    if job.status == PENDING:
+                        heapq.heappush(queue, (-job.priority, seq, job.job_id))
+                        seq += 1
+                    else:
+                        logger.info(f"{job.job_id}: {job.status} after {job.stage}")
+                self.store.save(self.jobs)
+
+        self.store.save(self.jobs)
+        summary: Dict[str, int] = {}
+        for job in self.jobs.values():
+            summary[job.status] = summary.get(job.status, 0) + 1
+        return summary
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Fleet job stages: scan -> fix -> validate -> pr.
+
+Each stage runs in a worker process and only sees the job dict, so stages
+reload the template from disk and hand results forward via `context`.
+Nothing here writes to the target checkout; fixes are emitted as patches
+and PRs as drafts for human review.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+import yaml
+
+from engine.matcher import PLACEHOLDER, TemplateMatcher
+from research.instrumentation import metrics, profile
+
+logger = logging.getLogger(__name__)
+
+STAGES = ['scan', 'fix', 'validate', 'pr']
+
+# Marker embedded in generated PR bodies so merge outcomes can be traced
+# back to the template that produced them.
+TEMPLATE_MARKER = '<!-- remediation-template: {template_id} -->'
+
+
+class ValidationError(ValueError):
+    """A fix failed validation; deterministic, so the scheduler does not retry it."""
+
+
+def _load_template(job: Dict) -> Dict:
+    with open(job['template_path'], 'r') as f:
+        return yaml.safe_load(f)
+
+
+def _job_dir(job: Dict, output_dir: str) -> Path:
+    safe_repo = job['repo'].replace('/', '__')
+    path = Path(output_dir) / safe_repo
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def scan_stage(job: Dict, template: Dict, output_dir: str) -> Dict:
+    """Find template hits in the repository."""
+    findings = TemplateMatcher(template).scan(job['path'])
+    return {
+        'findings': [
+            {'path': f.path, 'line': f.line, 'bindings': f.bindings}
+            for f in findings
+        ],
+        'finished': not findings,
+    }
+
+
+def fix_stage(job: Dict, template: Dict, output_dir: str) -> Dict:
+    """Generate a patch for every file with findings."""
+    matcher = TemplateMatcher(template)
+    if not matcher.can_fix:
+        return {'fixable': False, 'finished': True}
+    paths = sorted({f['path'] for f in job['context']['findings']})
+    diffs = matcher.fix(job['path'], paths)
+    patch_file = _job_dir(job, output_dir) / f"{job['template_id']}.patch"
+    with open(patch_file, 'w') as f:
+        f.write(''.join(diffs[p] for p in sorted(diffs)))
+    return {'fixable': True, 'patch_file': str(patch_file), 'files': sorted(diffs), 'finished': not diffs}
+
+
+def validate_stage(job: Dict, template: Dict, output_dir: str) -> Dict:
+    """
+    Check fixed files still parse and the original hits were rewritten.
+
+    A template's own output may match it again (`foo.bar()` ->
+    `foo.bar_v2()`, `try { X }` -> `try { X } catch ...`), so only hits
+    outside the rewritten spans count as left unfixed.
+
+    This is a sanity check, not a test run. The fix is recomputed with the
+    same regex, so the leftover check only catches new matches that the
+    fix creates across the edge of a replacement. Only `.py` files are parsed; JavaScript and TypeScript
+    fixes pass unchecked and rely on review and the repository's CI.
+    """
+    matcher = TemplateMatcher(template)
+    root = Path(job['path'])
+    errors = []
+    for rel_path in job['context']['files']:
+        fixed, spans = matcher.fix_spans((root / rel_path).read_text(encoding='utf-8'))
+        leftover = [
+            m for m in matcher.regex.finditer(fixed)
+            if not any(start <= m.start() and m.end() <= end for start, end in spans)
+        ]
+        if leftover:
+            errors.append(f"{rel_path}: {len(leftover)} template hit(s) left after fix")
+        if rel_path.endswith('.py'):
+            try:
+                compile(fixed, rel_path, 'exec')
+            except SyntaxError as e:
+                errors.append(f"{rel_path}: {e}")
+    if errors:
+        raise ValidationError('; '.join(errors))
+    return {'validated': True}
+
+
+def pr_stage(job: Dict, template: Dict, output_dir: str) -> Dict:
+    """Render a PR draft from the template's `pr_template`."""
+    pr_template = template.get('pr_template') or {}
+    findings = job['context']['findings']
+    bindings = dict(findings[0]['bindings']) if findings else {}
+    bindings.setdefault('file', findings[0]['path'] if findings else '')
+
+    def render(text: str) -> str:
+        return PLACEHOLDER.sub(lambda m: bindings.get(m.group(1), m.group(0)), text)
+
+    body = render(pr_template.get('body', '')).rstrip()
+    body += '\n\n' + TEMPLATE_MARKER.format(template_id=job['template_id'])
+    draft = {
+        'repo': job['repo'],
+        'template_id': job['template_id'],
+        'title': render(pr_template.get('title', template.get('name', ''))),
+        'body': body,
+        'patch_file': job['context']['patch_file'],
+    }
+    draft_file = _job_dir(job, output_dir) / f"{job['template_id']}.pr.json"
+    with open(draft_file, 'w') as f:
+        json.dump(draft, f, indent=2)
+    return {'pr_draft': str(draft_file)}
+
+
+STAGE_FUNCTIONS = {
+    'scan': scan_stage,
+    'fix': fix_stage,
+    'validate': validate_stage,
+    'pr': pr_stage,
+}
+
+
+def init_worker(metrics_enabled: bool):
+    """Pool initializer: forked workers must not re-report parent metrics."""
+    metrics.reset()
+    metrics.enabled = metrics_enabled
+
+
+def run_stage(job: Dict, output_dir: str, profile_dir: Optional[str] = None) -> Dict:
+    """
+    Worker entry point: run the job's current stage.
+
+    Returns:
+        Stage output merged into the job's context. `finished` short-circuits
+        the remaining stages (e.g. nothing found to fix). When metrics are
+        enabled, `_metrics` carries this worker's recordings back.
+    """
+    template = _load_template(job)
+    stage = job['stage']
+    profile_name = f"{job['repo'].replace('/', '__')}-{job['template_id']}-{stage}"
+    with profile(profile_name, profile_dir):
+        with metrics.timer('fleet_stage_seconds', stage=stage, template=job['template_id']):
+            result = STAGE_FUNCTIONS[stage](job, template, output_dir)
+    if metrics.enabled:
+        result['_metrics'] = metrics.drain()
+    return result
@@ -0,0 +1 @@
+"""Low-latency lookup of the best templates for a finding, snippet or diff."""
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+In-memory pattern index: nearest templates for a finding, snippet or diff.
+
+Every template is embedded once from its name, PR text and match/replace
+pattern. Research clusters (scored patterns with a `centroid`) are
+attached to their nearest template, so a query close to a cluster of
+real-world fixes finds that cluster's template even if the wording
+differs from the template's own text. A batch of queries is embedded in
+one call and scored against templates and centroids with one matrix
+product.
+"""
+
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from engine.matcher import TemplateMatcher
+from engine.templates import TemplateRegistry
+from research.embeddings import EmbeddingEngine, Embeddings
+from research.instrumentation import metrics
+from research.scoring.confidence_scorer import ConfidenceScorer
+
+logger = logging.getLogger(__name__)
+
+# How a template was matched, strongest first
+MATCH_RULE = 'rule'
+MATCH_PATTERN = 'pattern'
+MATCH_SEMANTIC = 'semantic'
+MATCH_RANK = {MATCH_RULE: 0, MATCH_PATTERN: 1, MATCH_SEMANTIC: 2}
+
+DIFF_HEADER = re.compile(r'^(diff --git|index |--- |\+\+\+ |@@)')
+
+
+def template_text(template: Dict) -> str:
+    """Text a template is embedded from."""
+    pattern = template.get('pattern') or {}
+    pr_template = template.get('pr_template') or {}
+    parts = [
+        template.get('name', ''),
+        template['id'].replace('_', ' '),
+        pr_template.get('title', ''),
+        pr_template.get('body', ''),
+        pattern.get('match', ''),
+        pattern.get('replace', ''),
+    ]
+    return '\n'.join(p for p in parts if p)
+
+
+def diff_code(diff: str) -> str:
+    """Added and removed lines of a unified diff, without markers or headers."""
+    lines = []
+    for line in diff.splitlines():
+        if DIFF_HEADER.match(line):
+            continue
+        if line[:1] in ('+', '-'):
+            lines.append(line[1:])
+    return '\n'.join(lines)
+
+
+def normalize_query(query: Dict) -> Dict:
+    """
+    Reduce a query to `{'rule_id', 'path', 'code', 'text'}`.
+
+    Accepted shapes:
+        {"sarif": <SARIF result>}
+        {"snippet": "...", "path": "src/app.js"}
+        {"diff": "<unified diff>"}
+    """
+    if 'sarif' in query:
+        result = query['sarif']
+        location = (result.get('locations') or [{}])[0].get('physicalLocation', {})
+        code = location.get('region', {}).get('snippet', {}).get('text', '')
+        message = result.get('message', {}).get('text', '')
+        return {
+            'rule_id': result.get('ruleId'),
+            'path': location.get('artifactLocation', {}).get('uri', ''),
+            'code': code,
+            'text': f"{message}\n{code}".strip(),
+        }
+    if 'snippet' in query:
+        return {'rule_id': None, 'path': query.get('path', ''), 'code': query['snippet'],
+                'text': query['snippet']}
+    if 'diff' in query:
+        code = diff_code(query['diff'])
+        return {'rule_id': None, 'path': query.get('path', ''), 'code': code, 'text': code}
+    raise ValueError("Query needs one of 'sarif', 'snippet' or 'diff'")
+
+
+def expand_sarif(report: Dict) -> List[Dict]:
+    """One query per result in a SARIF report."""
+    return [{'sarif': result} for run in report.get('runs', []) for result in run.get('results', [])]
+
+
+class PatternIndex:
+    """Templates, their confidence scores and research centroids, held in memory."""
+
+    def __init__(
+        self,
+        registry: TemplateRegistry,
+        patterns: Optional[List[Dict]] = None,
+        engine: Optional[EmbeddingEngine] = None,
+    ):
+        """
+        Build the index.
+
+        Args:
+            registry: Templates to recommend
+            patterns: Scored research patterns; those with a `centroid` are
+                attached to their nearest template
+            engine: Embeds templates and queries; must be the model the
+                centroids were produced with
+        """
+        self.engine = engine or EmbeddingEngine()
+        self.templates = registry.ranked()
+        self.template_ids = [t['id'] for t in self.templates]
+        self.positions = {template_id: i for i, template_id in enumerate(self.template_ids)}
+        self.matchers = [TemplateMatcher(t) for t in self.templates]
+        self.scores = [self._score(t) for t in self.templates]
+
+        template_vectors = self.engine.encode([template_text(t) for t in self.templates])
+        self.patterns = [p for p in patterns or [] if p.get('centroid')]
+        if self.patterns:
+            centroids = Embeddings.quantize(
+                np.array([p['centroid'] for p in self.patterns], dtype=np.float32),
+                template_vectors.dtype,
+            )
+            # Each research cluster backs the template it is closest to
+            owners = np.argmax(template_vectors.similarity(centroids.to_float32()), axis=1)
+        else:
+            centroids = Embeddings.empty(0, template_vectors.shape[1], template_vectors.dtype)
+            owners = np.empty(0, dtype=np.int64)
+
+        # Centroids sorted by owning template so per-template maxima are one reduceat
+        order = np.argsort(owners, kind='stable')
+        self.patterns = [self.patterns[i] for i in order]
+        self.pattern_owner = owners[order]
+        self.owned_templates, self.owner_starts = np.unique(self.pattern_owner, return_index=True)
+        self.vectors = self._stack(template_vectors, centroids.take(order))
+        logger.info(
+            f"Indexed {len(self.templates)} templates and {len(self.patterns)} research patterns"
+        )
+
+    @staticmethod
+    def _stack(first: Embeddings, second: Embeddings) -> Embeddings:
+        values = np.concatenate([first.values, second.values])
+        scales = None if first.scales is None else np.concatenate([first.scales, second.scales])
+        return Embeddings(values, scales)
+
+    @staticmethod
+    def _score(template: Dict) -> Dict[str, float]:
+        """ConfidenceScorer scores for a template's evidence."""
+        evidence = template.get('evidence')
+        if not evidence:
+            return {'overall_confidence': float(template.get('confidence', 0.0))}
+        scores = ConfidenceScorer.component_scores(evidence)
+        scores['overall_confidence'] = ConfidenceScorer.score_pattern({'evidence': evidence})
+        return scores
+
+    def update_scores(self, scores: Dict[str, Dict[str, float]]):
+        """Replace confidence scores of the given templates (e.g. from feedback)."""
+        for template_id, template_scores in scores.items():
+            if template_id in self.positions:
+                self.scores[self.positions[template_id]] = template_scores
+
+    @classmethod
+    def load(
+        cls,
+        template_dir: str = 'templates',
+        patterns_file: Optional[str] = 'data/scored_patterns.json',
+        engine: Optional[EmbeddingEngine] = None,
+    ) -> 'PatternIndex':
+        """Load templates and (if present) the scored pattern library."""
+        patterns = []
+        if patterns_file and Path(patterns_file).exists():
+            with open(patterns_file, 'r') as f:
+                patterns = json.load(f)
+        elif patterns_file:
+            logger.warning(f"Pattern library not found: {patterns_file}; using templates only")
+        return cls(TemplateRegistry.from_directory(template_dir), patterns, engine)
+
+    def lookup(self, queries: List[Dict], k: int = 3) -> List[List[Dict]]:
+        """
+        Best-matching templates for each query.
+
+        Args:
+            queries: Query dicts (see `normalize_query`)
+            k: Matches returned per query
+
+        Returns:
+            One list of matches per query, best first
+        """
+        if not queries:
+            return []
+        normalized = [normalize_query(q) for q in queries]
+        metrics.inc('lookup_queries_total', len(normalized))
+        with metrics.timer('lookup_seconds'):
+            query_vectors = self.engine.encode([q['text'] for q in normalized]).to_float32()
+            similarity = self.vectors.similarity(query_vectors)
+            n_templates = len(self.templates)
+            best = similarity[:, :n_templates].copy()
+            pattern_similarity = similarity[:, n_templates:]
+            if len(self.patterns):
+                backed = np.maximum.reduceat(pattern_similarity, self.owner_starts, axis=1)
+                best[:, self.owned_templates] = np.maximum(best[:, self.owned_templates], backed)
+
+            return [
+                self._rank(query, best[row], pattern_similarity[row], k)
+                for row, query in enumerate(normalized)
+            ]
+
+    def _rank(self, query: Dict, similarity: np.ndarray, pattern_similarity: np.ndarray,
+              k: int) -> List[Dict]:
+        matches = []
+        for i, template_id in enumerate(self.template_ids):
+            if query['rule_id'] == template_id:
+                kind = MATCH_RULE
+            elif query['code'] and self.matchers[i].scan_text(query['code'], query['path']):
+                kind = MATCH_PATTERN
+            else:
+                kind = MATCH_SEMANTIC
+            matches.append((MATCH_RANK[kind], -float(similarity[i]), i, kind))
+        matches.sort()
+
+        results = []
+        for _, negative_similarity, i, kind in matches[:k]:
+            template = self.templates[i]
+            result = {
+                'template_id': template['id'],
+                'name': template.get('name'),
+                'risk_tier': template.get('risk_tier'),
+                'match': kind,
+                'similarity': round(-negative_similarity, 4),
+                'confidence_scores': self.scores[i],
+            }
+            owned = np.flatnonzero(self.pattern_owner == i)
+            if len(owned):
+                nearest = owned[np.argmax(pattern_similarity[owned])]
+                pattern = self.patterns[nearest]
+                result['pattern'] = {
+                    'cluster_id': pattern.get('cluster_id'),
+                    'similarity': round(float(pattern_similarity[nearest]), 4),
+                    'confidence_scores': pattern.get('confidence_scores'),
+                }
+            results.append(result)
+        return results
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local HTTP API for the pattern index, over TCP or a Unix socket.
+
+Endpoints:
+    GET  /health          -> {"status": "ok", "templates": N, "patterns": M}
+    POST /lookup          -> {"results": [[match, ...], ...], "took_ms": 1.2}
+    POST /webhook/github  -> {"events": N, "rescored": [template_id, ...]}
+    GET  /feedback        -> per-template evidence, live outcomes and scores
+
+`/lookup` takes one query, {"queries": [...], "k": 3}, or a whole SARIF
+report {"sarif": {"runs": [...]}}, and answers every query in the request
+with one batched embedding call and one similarity pass.
+
+With a `FeedbackStore`, merge outcomes arriving on the webhook or appended
+to the event log re-score the affected templates, and lookups return the
+updated confidence right away.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from engine.feedback.sources import EventLog, events_from_github, verify_signature
+from engine.feedback.store import FeedbackStore
+from engine.lookup.index import PatternIndex, expand_sarif
+from research.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Largest request body accepted (bytes)
+MAX_BODY = 16 * 1024 * 1024
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """ThreadingHTTPServer bound to a Unix domain socket."""
+    address_family = socket.AF_UNIX
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def parse_request(payload: Dict) -> Tuple[List[Dict], int]:
+    """(queries, k) from a /lookup body."""
+    k = int(payload.get('k', 3))
+    if 'queries' in payload:
+        queries = payload['queries']
+    elif isinstance(payload.get('sarif'), dict) and 'runs' in payload['sarif']:
+        queries = expand_sarif(payload['sarif'])
+    else:
+        queries = [payload]
+    return queries, k
+
+
+class LookupServer:
+    """
+    Serve a loaded `PatternIndex`.
+
+    Usage:
+        with LookupServer(index, port=0) as server:
+            urlopen(f"{server.url}/health")
+    """
+
+    def __init__(
+        self,
+        index: PatternIndex,
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        socket_path: Optional[str] = None,
+        feedback: Optional[FeedbackStore] = None,
+        event_log: Optional[EventLog] = None,
+        webhook_secret: Optional[str] = None,
+        poll_interval: float = 2.0,
+    ):
+        """
+        Args:
+            index: Loaded pattern index
+            host, port: TCP address (ignored with `socket_path`)
+            socket_path: Listen on a Unix domain socket instead
+            feedback: Outcome store; enables /webhook/github and /feedback
+            event_log: Event log polled into `feedback` every `poll_interval`
+            webhook_secret: Require GitHub's HMAC signature on webhooks
+        """
+        self.index = index
+        self.socket_path = socket_path
+        self.feedback = feedback
+        self.event_log = event_log
+        self.webhook_secret = webhook_secret
+        self.poll_interval = poll_interval
+        # The engine's model and the feedback store are shared between
+        # request threads, so lookups and ingestion are serialized
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._poller = None
+        if feedback is not None:
+            index.update_scores(feedback.scores)
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self._server = UnixHTTPServer(socket_path, self._handler())
+        else:
+            self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        if self.socket_path:
+            return f"unix://{self.socket_path}"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def lookup(self, payload: Dict) -> Dict:
+        queries, k = parse_request(payload)
+        start = time.perf_counter()
+        with self._lock:
+            results = self.index.lookup(queries, k)
+        return {'results': results, 'took_ms': round((time.perf_counter() - start) * 1000, 3)}
+
+    def ingest(self, events: List[Dict]) -> Dict[str, Dict[str, float]]:
+        """Apply outcome events and push re-scored templates into the index."""
+        with self._lock:
+            updated = self.feedback.ingest(events)
+            self.index.update_scores(updated)
+        return updated
+
+    def poll(self):
+        """Ingest new event log lines and persist feedback state if it changed."""
+        with self._lock:
+            if self.event_log is not None:
+                self.index.update_scores(self.feedback.ingest_log(self.event_log))
+            if self.feedback.unsaved:
+                self.feedback.save()
+
+    def _poll_loop(self):
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Feedback poll failed: {e}")
+
+    def _handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send(self, status: int, payload: Dict):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/feedback' and service.feedback is not None:
+                    with service._lock:
+                        report = service.feedback.report()
+                    return self._send(200, report)
+                if self.path == '/health':
+                    return self._send(200, {
+                        'status': 'ok',
+                        'templates': len(service.index.templates),
+                        'patterns': len(service.index.patterns),
+                    })
+                return self._send(404, {'error': 'not found'})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                if length > MAX_BODY:
+                    self.close_connection = True
+                    return self._send(413, {'error': 'request too large'})
+                body = self.rfile.read(length)
+                if self.path == '/webhook/github' and service.feedback is not None:
+                    return self._webhook(body)
+                if self.path != '/lookup':
+                    return self._send(404, {'error': 'not found'})
+                metrics.inc('lookup_requests_total')
+                try:
+                    payload = json.loads(body or b'{}')
+                    response = service.lookup(payload)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    metrics.inc('lookup_errors_total')
+                    return self._send(400, {'error': str(e)})
+                return self._send(200, response)
+
+            def _webhook(self, body: bytes):
+                metrics.inc('feedback_webhooks_total')
+                if service.webhook_secret and not verify_signature(
+                    service.webhook_secret, body, self.headers.get('X-Hub-Signature-256')
+                ):
+                    return self._send(401, {'error': 'bad signature'})
+                if self.headers.get('X-GitHub-Event', 'pull_request') != 'pull_request':
+                    return self._send(200, {'events': 0, 'rescored': []})
+                try:
+                    events = events_from_github(json.loads(body))
+                    updated = service.ingest(events)
+                except (ValueError, KeyError, TypeError) as e:
+                    return self._send(400, {'error': str(e)})
+                return self._send(200, {'events': len(events), 'rescored': sorted(updated)})
+
+        return Handler
+
+    def _start_poller(self):
+        if self.feedback is not None and self._poller is None:
+            self._poller = threading.Thread(target=self._poll_loop, daemon=True)
+            self._poller.start()
+
+    def serve_forever(self):
+        logger.info(f"Lookup service listening on {self.url}")
+        self._start_poller()
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def start(self) -> 'LookupServer':
+        """Serve from a background thread."""
+        self._start_poller()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self.close()
+
+    def close(self):
+        self._stopped.set()
+        if self.feedback is not None:
+            self.poll()
+        self._server.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> 'LookupServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
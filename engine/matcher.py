@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Template matcher: find and fix template hits in a source tree."""
+
+import difflib
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from research.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_EXTENSIONS = {
+    'python': ['.py'],
+    'javascript': ['.js', '.jsx', '.mjs', '.cjs', '.json'],
+    'typescript': ['.ts', '.tsx'],
+}
+
+SKIP_DIRS = {'.git', 'node_modules', 'venv', '.venv', 'dist', 'build', '__pycache__'}
+
+PLACEHOLDER = re.compile(r'\{\{(\w+)\}\}')
+
+# Placeholders that span arbitrary code rather than a single identifier
+FREEFORM_PLACEHOLDERS = {'CODE', 'PARAMS'}
+
+
+@dataclass
+class Finding:
+    """A single template hit in a file."""
+    template_id: str
+    path: str
+    line: int
+    text: str
+    bindings: Dict[str, str] = field(default_factory=dict)
+
+
+def _compile_pattern(pattern: str) -> re.Pattern:
+    """Turn a `{{VAR}}` template pattern into a regex with named groups."""
+    parts = []
+    seen = set()
+    pos = 0
+    for m in PLACEHOLDER.finditer(pattern):
+        literal = pattern[pos:m.start()]
+        parts.append(r'\s*'.join(re.escape(chunk) for chunk in re.split(r'\s+', literal)))
+        name = m.group(1)
+        if name in seen:
+            parts.append(f'(?P={name})')
+        else:
+            seen.add(name)
+            following = pattern[m.end():m.end() + 1]
+            if following == '"':
+                parts.append(f'(?P<{name}>[^"\\n]*)')
+            elif name in FREEFORM_PLACEHOLDERS:
+                parts.append(f'(?P<{name}>[^\\n]*?)')
+            else:
+                parts.append(f'(?P<{name}>[\\w$.]+)')
+        pos = m.end()
+    literal = pattern[pos:]
+    parts.append(r'\s*'.join(re.escape(chunk) for chunk in re.split(r'\s+', literal)))
+    return re.compile(''.join(parts))
+
+
+class TemplateMatcher:
+    """Match a single template's `pattern` block against source files."""
+
+    def __init__(self, template: Dict):
+        self.template = template
+        self.template_id = template['id']
+        pattern = template.get('pattern') or {}
+        self.match = pattern.get('match', '')
+        self.replace = pattern.get('replace')
+        self.regex = _compile_pattern(self.match) if self.match else None
+        self.extensions = set()
+        for language in template.get('languages', []):
+            self.extensions.update(LANGUAGE_EXTENSIONS.get(language, []))
+
+    @property
+    def can_fix(self) -> bool:
+        """True if every placeholder in `replace` is bound by `match`."""
+        if not self.replace or self.regex is None:
+            return False
+        return set(PLACEHOLDER.findall(self.replace)) <= set(self.regex.groupindex)
+
+    def iter_files(self, repo_path: str) -> Iterator[Path]:
+        """Yield source files in the repo this template applies to."""
+        root = Path(repo_path)
+        for path in root.rglob('*'):
+            if path.suffix not in self.extensions or not path.is_file():
+                continue
+            if SKIP_DIRS.intersection(path.relative_to(root).parts):
+                continue
+            yield path
+
+    def scan_text(self, text: str, rel_path: str) -> List[Finding]:
+        """Find all hits in a file's contents."""
+        if self.regex is None:
+            return []
+        findings = []
+        for m in self.regex.finditer(text):
+            findings.append(Finding(
+                template_id=self.template_id,
+                path=rel_path,
+                line=text.count('\n', 0, m.start()) + 1,
+                text=m.group(0),
+                bindings={k: v for k, v in m.groupdict().items() if v is not None},
+            ))
+        return findings
+
+    def scan(self, repo_path: str) -> List[Finding]:
+        """Scan a repository checkout."""
+        root = Path(repo_path)
+        findings = []
+        files = 0
+        with metrics.timer('matcher_scan_seconds', template=self.template_id):
+            for path in self.iter_files(repo_path):
+                try:
+                    text = path.read_text(encoding='utf-8')
+                except (UnicodeDecodeError, OSError) as e:
+                    logger.debug(f"Skipping {path}: {e}")
+                    continue
+                files += 1
+                findings.extend(self.scan_text(text, str(path.relative_to(root))))
+        metrics.inc('matcher_files_scanned_total', files, template=self.template_id)
+        metrics.inc('matcher_findings_total', len(findings), template=self.template_id)
+        return findings
+
+    def _render(self, m: re.Match) -> str:
+        bindings = m.groupdict()
+        return PLACEHOLDER.sub(lambda p: bindings[p.group(1)], self.replace)
+
+    def fix_text(self, text: str) -> Tuple[str, int]:
+        """Apply the template to a file's contents; returns (new_text, count)."""
+        if not self.can_fix:
+            return text, 0
+        return self.regex.subn(self._render, text)
+
+    def fix_spans(self, text: str) -> Tuple[str, List[Tuple[int, int]]]:
+        """Like `fix_text`, but returns the (start, end) of each replacement in the new text."""
+        if not self.can_fix:
+            return text, []
+        pieces = []
+        spans = []
+        pos = 0
+        length = 0
+        for m in self.regex.finditer(text):
+            before = text[pos:m.start()]
+            rendered = self._render(m)
+            pieces.extend((before, rendered))
+            length += len(before)
+            spans.append((length, length + len(rendered)))
+            length += len(rendered)
+            pos = m.end()
+        pieces.append(text[pos:])
+        return ''.join(pieces), spans
+
+    def fix(self, repo_path: str, paths: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Compute fixes without touching the checkout.
+
+        Returns:
+            Mapping of relative path -> unified diff
+        """
+        root = Path(repo_path)
+        targets = [root / p for p in paths] if paths is not None else self.iter_files(repo_path)
+        diffs = {}
+        for path in targets:
+            rel_path = str(path.relative_to(root))
+            text = path.read_text(encoding='utf-8')
+            fixed, count = self.fix_text(text)
+            if count:
+                diffs[rel_path] = ''.join(difflib.unified_diff(
+                    text.splitlines(keepends=True),
+                    fixed.splitlines(keepends=True),
+                    fromfile=f'a/{rel_path}',
+                    tofile=f'b/{rel_path}',
+                ))
+        return diffs
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Template registry: load YAML templates and rank them for remediation."""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+from engine.validators.template_validator import TemplateValidator
+
+logger = logging.getLogger(__name__)
+
+# Lower index = safer = scheduled first
+RISK_TIERS = ['ULTRA_SAFE', 'SAFE', 'MODERATE', 'RISKY']
+
+
+def template_priority(template: Dict) -> float:
+    """
+    Priority of a template for scheduling (higher runs first).
+
+    Risk tier dominates, confidence breaks ties within a tier.
+    """
+    tier = template.get('risk_tier', 'MODERATE')
+    tier_rank = RISK_TIERS.index(tier) if tier in RISK_TIERS else len(RISK_TIERS)
+    return (len(RISK_TIERS) - tier_rank) + float(template.get('confidence', 0.0))
+
+
+class TemplateRegistry:
+    """In-memory registry of fix templates keyed by template id."""
+
+    def __init__(self, templates: Optional[List[Dict]] = None):
+        self.templates: Dict[str, Dict] = {}
+        for template in templates or []:
+            self.templates[template['id']] = template
+
+    @classmethod
+    def from_directory(cls, template_dir: str = "templates") -> 'TemplateRegistry':
+        """Load every *.yaml template in a directory, skipping invalid ones."""
+        templates = []
+        for path in sorted(Path(template_dir).glob("*.yaml")):
+            try:
+                with open(path, 'r') as f:
+                    template = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                logger.warning(f"Skipping invalid template {path}: {e}")
+                continue
+            valid, errors = TemplateValidator.validate_template(template)
+            if not valid:
+                logger.warning(f"Skipping invalid template {path}: {'; '.join(errors)}")
+                continue
+            template['_path'] = str(path)
+            templates.append(template)
+        logger.info(f"Loaded {len(templates)} templates from {template_dir}")
+        return cls(templates)
+
+    def get(self, template_id: str) -> Optional[Dict]:
+        return self.templates.get(template_id)
+
+    def ranked(self, template_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Templates ordered by scheduling priority, optionally filtered."""
+        templates = [
+            t for t in self.templates.values()
+            if template_ids is None or t['id'] in template_ids
+        ]
+        return sorted(templates, key=template_priority, reverse=True)
+
+    def __len__(self) -> int:
+        return len(self.templates)
@@ -17,14 +17,22 @@ class TemplateValidator:
     @staticmethod
     def validate(template_file: str) -> Tuple[bool, List[str]]:
         """Validate template file."""
-        errors = []
-        
         try:
             with open(template_file, 'r') as f:
                 template = yaml.safe_load(f)
         except Exception as e:
             return False, [f"Failed to load YAML: {e}"]
         
+        return TemplateValidator.validate_template(template)
+    
+    @staticmethod
+    def validate_template(template: Dict) -> Tuple[bool, List[str]]:
+        """Validate an already loaded template."""
+        if not isinstance(template, dict):
+            return False, ["Template is not a mapping"]
+        
+        errors = []
+        
         # Check required fields
         for field in TemplateValidator.REQUIRED_FIELDS:
             if field not in template:
@@ -33,7 +41,7 @@ class TemplateValidator:
         # Validate confidence
         if 'confidence' in template:
             conf = template['confidence']
-            if not isinstance(conf, (int, float)) or not (0 <= conf <= 1):
+            if isinstance(conf, bool) or not isinstance(conf, (int, float)) or not (0 <= conf <= 1):
                 errors.append(f"Invalid confidence: {conf} (must be 0-1)")
         
         # Validate languages
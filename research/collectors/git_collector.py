@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Offline PR collector that mines local git mirrors instead of the GitHub API.
+
+Merged PRs are recovered from first-parent history: GitHub merge commits
+("Merge pull request #N from user/branch") and squash merges ("Title (#N)").
+Timestamps, commit counts and file/line stats come from git; reverts come
+from "This reverts commit <sha>" messages anywhere in history. Review and
+comment counts and labels are not in git, so they are left at zero unless
+`fill_from_api` is set, which costs one API call per PR instead of the
+API collector's list + detail + search calls.
+
+A squash commit is authored at merge time and keeps none of the branch's
+commits, so a squash-merged PR's creation time is unknown: its
+`created_at` and `merge_time_hours` are None (and the merge-time filter
+does not apply) unless `fill_from_api` supplies them.
+"""
+
+import json
+import logging
+import re
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Generator, List, Optional, Tuple
+import os
+
+from research.collectors.heuristics import is_security_related
+from research.instrumentation import metrics
+from research.models.pr import PRMetadata
+
+logger = logging.getLogger(__name__)
+
+MERGE_SUBJECT = re.compile(r'^Merge pull request #(\d+) from ([^/\s]+)/\S+')
+SQUASH_SUBJECT = re.compile(r'^(.*) \(#(\d+)\)$')
+REVERTS_COMMIT = re.compile(r'This reverts commit ([0-9a-f]{7,40})')
+# Shortest abbreviation a revert message may use; reverts are indexed by it
+SHA_PREFIX = 7
+
+# Sha prefix -> [(reverted sha as written, earliest revert commit time)]
+RevertIndex = Dict[str, List[Tuple[str, int]]]
+
+# Field/record separators for `git log --format`
+FS = '\x1f'
+RS = '\x1e'
+
+
+def _iso(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class GitMirrorCollector:
+    """Collect PRMetadata records from local clones or bare mirrors."""
+
+    def __init__(
+        self,
+        mirrors: Dict[str, str],
+        output_file: str = "data/raw_prs.jsonl",
+        max_prs_per_repo: Optional[int] = None,
+        min_merge_time_hours: float = 0.5,
+        workers: Optional[int] = None,
+        fill_from_api: bool = False,
+        ref: str = "HEAD",
+    ):
+        """
+        Initialize collector.
+
+        Args:
+            mirrors: "owner/repo" -> path of a local clone or bare mirror
+            output_file: Path to write JSONL output
+            max_prs_per_repo: Maximum PRs per repository (None = all history)
+            min_merge_time_hours: Minimum merge time to include
+            workers: Threads for concurrent git reads
+            fill_from_api: Fetch comments/reviews/labels from the GitHub API
+            ref: Branch whose first-parent history is mined
+        """
+        self.mirrors = mirrors
+        self.output_file = Path(output_file)
+        self.max_prs_per_repo = max_prs_per_repo
+        self.min_merge_time_hours = min_merge_time_hours
+        self.workers = workers or min(8, (os.cpu_count() or 1) * 2)
+        self.fill_from_api = fill_from_api
+        self.ref = ref
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        self.collected_count = 0
+        self.skipped_count = 0
+        self._api = None
+
+    @staticmethod
+    def _git(path: str, *args: str) -> str:
+        result = subprocess.run(
+            ['git', '-C', path, *args],
+            check=True, capture_output=True, text=True, encoding='utf-8', errors='replace',
+        )
+        return result.stdout
+
+    def _read_merges(self, path: str) -> List[Dict]:
+        """First-parent history with per-commit numstat against the first parent."""
+        out = self._git(
+            path, 'log', self.ref, '--first-parent', '--diff-merges=first-parent', '--numstat',
+            f'--format={RS}%H{FS}%P{FS}%an{FS}%at{FS}%ct{FS}%s{FS}%b{FS}',
+        )
+        commits = []
+        for chunk in out.split(RS)[1:]:
+            sha, parents, author, author_time, commit_time, subject, body, stats = chunk.split(FS)
+            files = additions = deletions = 0
+            for line in stats.strip().splitlines():
+                added, deleted, _ = line.split('\t', 2)
+                files += 1
+                additions += int(added) if added != '-' else 0
+                deletions += int(deleted) if deleted != '-' else 0
+            commits.append({
+                'sha': sha,
+                'parents': parents.split(),
+                'author': author,
+                'author_time': int(author_time),
+                'commit_time': int(commit_time),
+                'subject': subject,
+                'body': body.strip(),
+                'files': files,
+                'additions': additions,
+                'deletions': deletions,
+            })
+        return commits
+
+    def _read_reverts(self, path: str) -> RevertIndex:
+        """
+        Reverted shas, indexed by their first 7 characters.
+
+        Revert messages may name a sha abbreviated to any length of at
+        least 7, so each entry keeps the full reference and its earliest
+        revert commit time.
+        """
+        out = self._git(
+            path, 'log', self.ref, '--grep=This reverts commit', f'--format={RS}%ct{FS}%B',
+        )
+        earliest: Dict[str, int] = {}
+        for chunk in out.split(RS)[1:]:
+            commit_time, message = chunk.split(FS, 1)
+            for sha in REVERTS_COMMIT.findall(message):
+                earliest[sha] = min(earliest.get(sha, int(commit_time)), int(commit_time))
+        reverts: RevertIndex = {}
+        for sha, revert_time in earliest.items():
+            reverts.setdefault(sha[:SHA_PREFIX], []).append((sha, revert_time))
+        return reverts
+
+    def _branch_commits(self, path: str, base: str, head: str) -> List[Tuple[str, int]]:
+        """(sha, author_time) of commits a merged branch brought in."""
+        out = self._git(path, 'log', f'--format=%H{FS}%at', f'{base}..{head}')
+        commits = []
+        for line in out.splitlines():
+            sha, author_time = line.split(FS)
+            commits.append((sha, int(author_time)))
+        return commits
+
+    @staticmethod
+    def _parse_pr(commit: Dict) -> Optional[Dict]:
+        """PR number/title/body/author from a merge or squash commit."""
+        m = MERGE_SUBJECT.match(commit['subject'])
+        if m and len(commit['parents']) == 2:
+            title, _, body = commit['body'].partition('\n')
+            return {'number': int(m.group(1)), 'title': title.strip() or commit['subject'],
+                    'body': body.strip(), 'author': m.group(2), 'merge': True}
+        m = SQUASH_SUBJECT.match(commit['subject'])
+        if m and len(commit['parents']) == 1:
+            return {'number': int(m.group(2)), 'title': m.group(1), 'body': commit['body'],
+                    'author': commit['author'], 'merge': False}
+        return None
+
+    @staticmethod
+    def _revert_time(shas: List[str], reverts: RevertIndex) -> Optional[int]:
+        times = [
+            revert_time
+            for sha in shas
+            for ref, revert_time in reverts.get(sha[:SHA_PREFIX], ())
+            if sha.startswith(ref)
+        ]
+        return min(times) if times else None
+
+    def _build(self, owner: str, repo: str, path: str, commit: Dict, pr: Dict,
+               reverts: RevertIndex) -> Optional[PRMetadata]:
+        shas = [commit['sha']]
+        # Unknown for squash merges: the squash commit is authored at merge time
+        created_time = None
+        commit_count = 1
+        if pr['merge']:
+            created_time = commit['author_time']
+            branch = self._branch_commits(path, commit['parents'][0], commit['parents'][1])
+            if branch:
+                shas += [sha for sha, _ in branch]
+                created_time = min(t for _, t in branch)
+                commit_count = len(branch)
+
+        merged_time = commit['commit_time']
+        revert_time = self._revert_time(shas, reverts)
+
+        record = {
+            'repo': repo,
+            'owner': owner,
+            'pr_number': pr['number'],
+            'title': pr['title'],
+            'body': pr['body'],
+            'created_at': _iso(created_time) if created_time is not None else None,
+            'merged_at': _iso(merged_time),
+            'closed_at': _iso(merged_time),
+            'merge_time_hours': (merged_time - created_time) / 3600 if created_time is not None else None,
+            'author': pr['author'],
+            'files_changed': commit['files'],
+            'additions': commit['additions'],
+            'deletions': commit['deletions'],
+            'comments': 0,
+            'review_comments': 0,
+            'commits': commit_count,
+            'labels': [],
+            'merged': True,
+            'is_security_related': False,
+            'has_revert': revert_time is not None,
+            'revert_time_hours': (revert_time - merged_time) / 3600 if revert_time is not None else None,
+        }
+        if self.fill_from_api:
+            self._fill_from_api(record)
+        if record['merge_time_hours'] is not None and record['merge_time_hours'] < self.min_merge_time_hours:
+            return None
+        record['is_security_related'] = is_security_related(
+            record['title'], record['body'], record['labels']
+        )
+        return PRMetadata(**record)
+
+    def _fill_from_api(self, record: Dict):
+        """Overlay fields git cannot provide with the API's values."""
+        if self._api is None:
+            # Imported lazily: the API collector requires GITHUB_TOKEN
+            from research.collectors.github_collector import GitHubCollector
+            self._api = GitHubCollector([], output_file=str(self.output_file.with_suffix('.api.jsonl')))
+        pr = self._api.fetch_pr(record['owner'], record['repo'], record['pr_number'])
+        if pr is None:
+            return
+        record.update({
+            'title': pr['title'],
+            'body': pr.get('body') or '',
+            'author': pr['user']['login'],
+            'comments': pr['comments'],
+            'review_comments': pr['review_comments'],
+            'commits': pr['commits'],
+            'labels': [label['name'] for label in pr.get('labels', [])],
+        })
+        if pr.get('created_at') and pr.get('merged_at'):
+            created = datetime.fromisoformat(pr['created_at'].replace('Z', '+00:00'))
+            merged = datetime.fromisoformat(pr['merged_at'].replace('Z', '+00:00'))
+            record['created_at'] = pr['created_at']
+            record['merge_time_hours'] = (merged - created).total_seconds() / 3600
+
+    def iter_repo_prs(
+        self, owner: str, repo: str, include_security_only: bool = True
+    ) -> Generator[PRMetadata, None, None]:
+        """
+        Collect PRs from a single mirror, newest first.
+
+        Yields:
+            PRMetadata objects
+        """
+        path = self.mirrors[f"{owner}/{repo}"]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # History and revert scans are independent; read them concurrently
+            merges_future = pool.submit(self._read_merges, path)
+            reverts_future = pool.submit(self._read_reverts, path)
+            with metrics.timer('git_log_seconds', repo=f"{owner}/{repo}"):
+                commits = merges_future.result()
+                reverts = reverts_future.result()
+
+            candidates = deque()
+            for commit in commits:
+                pr = self._parse_pr(commit)
+                if pr is not None:
+                    candidates.append((commit, pr))
+            logger.info(f"{owner}/{repo}: {len(candidates)} merged PRs in {len(commits)} commits")
+
+            # Branch walks (one `git log` each) run across the pool, newest
+            # first, at most `workers` ahead of the consumer, so reaching the
+            # PR cap stops the walk instead of waiting on all of history
+            pending = deque()
+            collected = 0
+            try:
+                while candidates or pending:
+                    if self.max_prs_per_repo is not None and collected >= self.max_prs_per_repo:
+                        break
+                    while candidates and len(pending) < self.workers:
+                        commit, pr = candidates.popleft()
+                        pending.append(pool.submit(self._build, owner, repo, path, commit, pr, reverts))
+                    metadata = pending.popleft().result()
+                    if metadata is None:
+                        self.skipped_count += 1
+                        continue
+                    if include_security_only and not metadata.is_security_related:
+                        continue
+                    self.collected_count += 1
+                    metrics.inc('git_prs_collected_total')
+                    collected += 1
+                    yield metadata
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def collect_prs(self, include_security_only: bool = True) -> Generator[PRMetadata, None, None]:
+        """
+        Collect PRs from all mirrors.
+
+        Yields:
+            PRMetadata objects
+        """
+        with open(self.output_file, 'w') as f:
+            for repo_spec in self.mirrors:
+                owner, repo = repo_spec.split('/')
+                logger.info(f"Collecting from mirror of {owner}/{repo}")
+                for metadata in self.iter_repo_prs(owner, repo, include_security_only):
+                    f.write(json.dumps(asdict(metadata)) + '\n')
+                    f.flush()
+                    yield metadata
+                logger.info(
+                    f"Completed {owner}/{repo}: "
+                    f"Collected={self.collected_count}, Skipped={self.skipped_count}"
+                )
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Usage: python -m research.collectors.git_collector owner/repo=/path/to/mirror.git ...
+    mirrors = dict(arg.split('=', 1) for arg in sys.argv[1:])
+    if not mirrors:
+        sys.exit("Usage: python -m research.collectors.git_collector owner/repo=/path/to/mirror ...")
+
+    collector = GitMirrorCollector(mirrors, output_file="data/raw_prs.jsonl")
+    count = sum(1 for _ in collector.collect_prs(include_security_only=True))
+    logger.info(f"Collected {count} PRs to {collector.output_file}")
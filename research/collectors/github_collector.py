@@ -7,7 +7,7 @@ Analyzes merge patterns from high-quality repositories.
 import json
 import logging
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import asdict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Optional, Generator
@@ -16,6 +16,10 @@ import os
 import requests
 from dotenv import load_dotenv
 
+from research.collectors.heuristics import is_security_related
+from research.instrumentation import metrics
+from research.models.pr import PRMetadata
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -25,7 +29,7 @@ logging.basicConfig(
 )
 
 # GitHub API configuration
-GITHUB_API_BASE = "https://api.github.com"
+GITHUB_API_BASE = os.getenv("GITHUB_API_BASE", "https://api.github.com")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 if not GITHUB_TOKEN:
     raise ValueError(
@@ -41,31 +45,8 @@ HEADERS = {
 # Timeout for rate limit reset (seconds)
 RATE_LIMIT_BUFFER = 5
 
-
-@dataclass
-class PRMetadata:
-    """Complete metadata for a single PR."""
-    repo: str
-    owner: str
-    pr_number: int
-    title: str
-    body: str
-    created_at: str
-    merged_at: str
-    closed_at: str
-    merge_time_hours: float
-    author: str
-    files_changed: int
-    additions: int
-    deletions: int
-    comments: int
-    review_comments: int
-    commits: int
-    labels: List[str]
-    merged: bool
-    is_security_related: bool
-    has_revert: bool
-    revert_time_hours: Optional[float]
+# Histogram buckets for API calls needed per collected PR
+API_CALLS_BUCKETS = (1, 2, 3, 5, 10, 20, float('inf'))
 
 
 class GitHubCollector:
@@ -76,7 +57,8 @@ class GitHubCollector:
         repositories: List[str],
         output_file: str = "data/raw_prs.jsonl",
         max_prs_per_repo: int = 100,
-        min_merge_time_hours: float = 0.5
+        min_merge_time_hours: float = 0.5,
+        request_delay: float = 0.5
     ):
         """
         Initialize collector.
@@ -86,14 +68,24 @@ class GitHubCollector:
             output_file: Path to write JSONL output
             max_prs_per_repo: Maximum PRs to collect per repository
             min_merge_time_hours: Minimum merge time to include
+            request_delay: Pause between PRs to stay under rate limits
         """
         self.repositories = repositories
         self.output_file = Path(output_file)
         self.max_prs_per_repo = max_prs_per_repo
         self.min_merge_time_hours = min_merge_time_hours
+        self.request_delay = request_delay
         self.output_file.parent.mkdir(parents=True, exist_ok=True)
         self.collected_count = 0
         self.skipped_count = 0
+        self.api_calls = 0
+
+    def _api_get(self, url: str, endpoint: str) -> requests.Response:
+        """GET a GitHub API URL, recording call count and latency."""
+        self.api_calls += 1
+        metrics.inc('github_api_calls_total', endpoint=endpoint)
+        with metrics.timer('github_api_latency_seconds', endpoint=endpoint):
+            return requests.get(url, headers=HEADERS, timeout=10)
 
     def _handle_rate_limit(self, response: requests.Response):
         """Handle GitHub rate limiting."""
@@ -102,30 +94,19 @@ class GitHubCollector:
             now = time.time()
             wait_seconds = max(reset_time - now + RATE_LIMIT_BUFFER, 0)
             logger.warning(f"Rate limited. Waiting {wait_seconds:.0f} seconds...")
+            metrics.inc('github_rate_limit_waits_total')
+            metrics.inc('github_rate_limit_wait_seconds_total', wait_seconds)
             time.sleep(wait_seconds)
             return True
         return False
 
     def _is_security_related(self, pr: dict) -> bool:
         """Detect if PR is security-related."""
-        title_body = (pr.get('title', '') + ' ' + pr.get('body', '')).lower()
-        labels = [l['name'].lower() for l in pr.get('labels', [])]
-        
-        security_keywords = {
-            'security', 'vulnerability', 'cve', 'xss', 'sql injection',
-            'csrf', 'secret', 'credential', 'auth', 'password',
-            'encryption', 'hash', 'sensitive', 'vulnerability',
-            'dependency', 'dependencies', 'npm', 'package',
-            'deprecated', 'warning', 'critical', 'fix'
-        }
-        
-        title_keywords = set(title_body.split()) & security_keywords
-        label_keywords = any(
-            any(keyword in label for keyword in security_keywords)
-            for label in labels
+        return is_security_related(
+            pr.get('title', ''),
+            pr.get('body', ''),
+            [l['name'] for l in pr.get('labels', [])],
         )
-        
-        return bool(title_keywords) or label_keywords or 'security' in labels
 
     def _detect_revert(self, repo: str, original_pr: dict) -> tuple[bool, Optional[float]]:
         """
@@ -142,11 +123,11 @@ class GitHubCollector:
             # Search for PRs that reference this one
             search_url = (
                 f"{GITHUB_API_BASE}/search/issues"
-                f"?q=repo:{repo}+type:pr+in:body+#{original_pr['number']}"
+                f"?q=repo:{repo}+type:pr+in:body+%23{original_pr['number']}"
                 f"&sort=created&order=desc"
             )
             
-            response = requests.get(search_url, headers=HEADERS, timeout=10)
+            response = self._api_get(search_url, 'search')
             if self._handle_rate_limit(response):
                 return self._detect_revert(repo, original_pr)
             
@@ -170,21 +151,28 @@ class GitHubCollector:
             logger.debug(f"Revert detection failed: {e}")
             return False, None
 
+    def fetch_pr(self, owner: str, repo: str, pr_number: int) -> Optional[dict]:
+        """Fetch the raw PR payload from GitHub API."""
+        pr_url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls/{pr_number}"
+        response = self._api_get(pr_url, 'pull')
+        
+        if self._handle_rate_limit(response):
+            return self.fetch_pr(owner, repo, pr_number)
+        
+        if response.status_code != 200:
+            logger.warning(f"Failed to fetch {owner}/{repo}#{pr_number}")
+            return None
+        
+        return response.json()
+
     def _get_pr_details(self, owner: str, repo: str, pr_number: int) -> Optional[PRMetadata]:
         """Fetch complete PR details from GitHub API."""
+        calls_before = self.api_calls
         try:
-            pr_url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls/{pr_number}"
-            response = requests.get(pr_url, headers=HEADERS, timeout=10)
-            
-            if self._handle_rate_limit(response):
-                return self._get_pr_details(owner, repo, pr_number)
-            
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch {owner}/{repo}#{pr_number}")
+            pr = self.fetch_pr(owner, repo, pr_number)
+            if pr is None:
                 return None
             
-            pr = response.json()
-            
             # Skip if not merged
             if not pr.get('merged_at'):
                 self.skipped_count += 1
@@ -235,12 +223,74 @@ class GitHubCollector:
             )
             
             self.collected_count += 1
+            metrics.inc('github_prs_collected_total')
+            metrics.observe(
+                'github_api_calls_per_pr', self.api_calls - calls_before, buckets=API_CALLS_BUCKETS
+            )
             return metadata
             
         except Exception as e:
             logger.error(f"Error fetching PR details: {e}")
             return None
 
+    def iter_repo_prs(
+        self, owner: str, repo: str, include_security_only: bool = True
+    ) -> Generator[PRMetadata, None, None]:
+        """
+        Collect PRs from a single repository.
+        
+        Args:
+            owner: Repository owner
+            repo: Repository name
+            include_security_only: Only include security-related PRs
+            
+        Yields:
+            PRMetadata objects
+        """
+        prs_collected = 0
+        page = 1
+        
+        while prs_collected < self.max_prs_per_repo:
+            # Fetch PR list
+            list_url = (
+                f"{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls"
+                f"?state=closed&sort=created&direction=desc"
+                f"&page={page}&per_page=100"
+            )
+            
+            response = self._api_get(list_url, 'pulls')
+            
+            if self._handle_rate_limit(response):
+                continue
+            
+            if response.status_code != 200:
+                logger.warning(f"Failed to fetch PR list page {page}")
+                break
+            
+            prs = response.json()
+            if not prs:
+                break
+            
+            for pr in prs:
+                if prs_collected >= self.max_prs_per_repo:
+                    break
+                
+                metadata = self._get_pr_details(owner, repo, pr['number'])
+                
+                if metadata is None:
+                    continue
+                
+                if include_security_only and not metadata.is_security_related:
+                    continue
+                
+                yield metadata
+                prs_collected += 1
+                
+                # Rate limiting
+                time.sleep(self.request_delay)
+            
+            page += 1
+
     def collect_prs(self, include_security_only: bool = True) -> Generator[PRMetadata, None, None]:
         """
         Collect PRs from all repositories.
@@ -256,53 +306,12 @@ class GitHubCollector:
                 owner, repo = repo_spec.split('/')
                 logger.info(f"Collecting from {owner}/{repo}")
                 
-                prs_collected = 0
-                page = 1
-                
-                while prs_collected < self.max_prs_per_repo:
-                    # Fetch PR list
-                    list_url = (
-                        f"{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls"
-                        f"?state=closed&sort=created&direction=desc"
-                        f"&page={page}&per_page=100"
-                    )
-                    
-                    response = requests.get(list_url, headers=HEADERS, timeout=10)
-                    
-                    if self._handle_rate_limit(response):
-                        continue
-                    
-                    if response.status_code != 200:
-                        logger.warning(f"Failed to fetch PR list page {page}")
-                        break
-                    
-                    prs = response.json()
-                    if not prs:
-                        break
-                    
-                    for pr in prs:
-                        if prs_collected >= self.max_prs_per_repo:
-                            break
-                        
-                        metadata = self._get_pr_details(owner, repo, pr['number'])
-                        
-                        if metadata is None:
-                            continue
-                        
-                        if include_security_only and not metadata.is_security_related:
-                            continue
-                        
-                        # Write to JSONL
-                        f.write(json.dumps(asdict(metadata)) + '\n')
-                        f.flush()
-                        
-                        yield metadata
-                        prs_collected += 1
-                        
-                        # Rate limiting
-                        time.sleep(0.5)
+                for metadata in self.iter_repo_prs(owner, repo, include_security_only):
+                    # Write to JSONL
+                    f.write(json.dumps(asdict(metadata)) + '\n')
+                    f.flush()
                     
-                    page += 1
+                    yield metadata
                 
                 logger.info(
                     f"Completed {owner}/{repo}: "
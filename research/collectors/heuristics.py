@@ -0,0 +1,25 @@
+"""PR classification heuristics shared by all collectors."""
+
+from typing import List
+
+SECURITY_KEYWORDS = {
+    'security', 'vulnerability', 'cve', 'xss', 'sql injection',
+    'csrf', 'secret', 'credential', 'auth', 'password',
+    'encryption', 'hash', 'sensitive', 'vulnerability',
+    'dependency', 'dependencies', 'npm', 'package',
+    'deprecated', 'warning', 'critical', 'fix'
+}
+
+
+def is_security_related(title: str, body: str, labels: List[str]) -> bool:
+    """Detect if a PR is security-related from its text and label names."""
+    title_body = ((title or '') + ' ' + (body or '')).lower()
+    labels = [label.lower() for label in labels]
+    
+    title_keywords = set(title_body.split()) & SECURITY_KEYWORDS
+    label_keywords = any(
+        any(keyword in label for keyword in SECURITY_KEYWORDS)
+        for label in labels
+    )
+    
+    return bool(title_keywords) or label_keywords or 'security' in labels
@@ -0,0 +1,10 @@
+"""Batched, quantized text embeddings for PR clustering and pattern lookup."""
+
+from research.embeddings.engine import MAX_CHARS, EmbeddingEngine, pr_text
+from research.embeddings.models import DEFAULT_MODEL, HashingModel, load_model
+from research.embeddings.quantize import DTYPES, Embeddings
+
+__all__ = [
+    'DEFAULT_MODEL', 'DTYPES', 'MAX_CHARS', 'EmbeddingEngine', 'Embeddings',
+    'HashingModel', 'load_model', 'pr_text',
+]
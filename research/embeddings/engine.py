@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Batched, multi-process embedding of PR text.
+
+Texts are sorted by length and cut into fixed-size batches, so each batch
+pads to a similar length instead of to the longest text in the corpus.
+Batches are spread over CPU worker processes (each loads the model once
+and runs single-threaded torch), quantized in the worker and written back
+into one preallocated `Embeddings` matrix in input order.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from research.embeddings.models import DEFAULT_MODEL, load_model
+from research.embeddings.quantize import DTYPES, Embeddings
+from research.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Characters of title + body kept per text; MiniLM truncates at 256 tokens anyway
+MAX_CHARS = 2000
+
+# Model loaded once per worker process by `_init_worker`
+_worker_model = None
+
+
+def pr_text(title: str, body: Optional[str] = None, max_chars: int = MAX_CHARS) -> str:
+    """Text embedded for a PR: title, blank line, body."""
+    text = f"{title}\n\n{body}" if body else title
+    return text[:max_chars]
+
+
+def _encode(model, texts: Sequence[str], dtype: str) -> Embeddings:
+    matrix = model.encode(list(texts), batch_size=len(texts), convert_to_numpy=True,
+                          show_progress_bar=False)
+    return Embeddings.quantize(matrix, dtype)
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = load_model(model, threads=1)
+
+
+def _encode_in_worker(texts: Sequence[str], dtype: str) -> Embeddings:
+    return _encode(_worker_model, texts, dtype)
+
+
+class EmbeddingEngine:
+    """Embed texts into a (possibly quantized) row-normalized matrix."""
+
+    def __init__(
+        self,
+        model: Union[str, object] = DEFAULT_MODEL,
+        workers: int = 1,
+        batch_size: int = 64,
+        dtype: str = 'float32',
+        max_chars: int = MAX_CHARS,
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            model: Model spec for `load_model` (name, "hashing", or an
+                object with `encode`; objects are pickled to workers)
+            workers: Encoder processes; 1 encodes in-process, 0 uses every CPU
+            batch_size: Texts per length bucket
+            dtype: Storage type, one of float32, float16, int8
+            max_chars: Truncate texts to this many characters
+        """
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}, got {dtype!r}")
+        self.model = model
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.dtype = dtype
+        self.max_chars = max_chars
+        self._model = None
+
+    def _local_model(self):
+        if self._model is None:
+            self._model = load_model(self.model)
+        return self._model
+
+    def buckets(self, texts: Sequence[str]) -> list:
+        """Index arrays of length-sorted batches, longest first."""
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        order = np.argsort(-lengths, kind='stable')
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+    def encode(self, texts: Sequence[str]) -> Embeddings:
+        """
+        Embed `texts`; row i of the result belongs to texts[i].
+
+        Longest batches are dispatched first so the slowest work doesn't
+        end up as a straggler on one worker.
+        """
+        texts = [t[:self.max_chars] for t in texts]
+        if not texts:
+            return Embeddings.empty(0, 0, self.dtype)
+        buckets = self.buckets(texts)
+        batches = ([texts[i] for i in bucket] for bucket in buckets)
+
+        metrics.inc('embedding_texts_total', len(texts))
+        metrics.inc('embedding_batches_total', len(buckets))
+        with metrics.timer('embedding_encode_seconds', dtype=self.dtype):
+            if self.workers == 1 or len(buckets) == 1:
+                model = self._local_model()
+                results = (_encode(model, batch, self.dtype) for batch in batches)
+                out = self._gather(buckets, results, len(texts))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=min(self.workers, len(buckets)),
+                    initializer=_init_worker,
+                    initargs=(self.model,),
+                ) as pool:
+                    results = pool.map(
+                        _encode_in_worker, batches, [self.dtype] * len(buckets),
+                        chunksize=max(1, len(buckets) // (self.workers * 4)),
+                    )
+                    out = self._gather(buckets, results, len(texts))
+        logger.debug(f"Embedded {len(texts)} texts in {len(buckets)} batches ({self.dtype})")
+        return out
+
+    def _gather(self, buckets, results, count: int) -> Embeddings:
+        out = None
+        for bucket, embeddings in zip(buckets, results):
+            if out is None:
+                out = Embeddings.empty(count, embeddings.shape[1], self.dtype)
+            out.assign(bucket, embeddings)
+        return out
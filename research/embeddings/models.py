@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Embedding models: SentenceTransformer on CPU, or a deterministic hashing stub."""
+
+import hashlib
+import re
+from typing import List, Optional, Union
+
+import numpy as np
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+
+TOKEN = re.compile(r'\w+')
+
+
+class HashingModel:
+    """
+    Feature-hashing model with the `encode` interface of SentenceTransformer.
+
+    Texts sharing tokens land close together, so clustering still has
+    structure to find, but no model download is needed. Output depends only
+    on the input text, which makes it usable in tests and benchmarks.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in TOKEN.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], 'little') % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                out[row, index] += sign
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+def load_model(model: Union[str, object] = DEFAULT_MODEL, threads: Optional[int] = None):
+    """
+    Resolve a model spec.
+
+    Args:
+        model: A SentenceTransformer name, "hashing" / "hashing:<dim>" for
+            the stub, or an object with `encode` (returned as-is)
+        threads: Torch intra-op threads; set to 1 per worker process so
+            several workers don't oversubscribe the cores
+    """
+    if not isinstance(model, str):
+        return model
+    if model == 'hashing' or model.startswith('hashing:'):
+        _, _, dim = model.partition(':')
+        return HashingModel(int(dim) if dim else 384)
+
+    from sentence_transformers import SentenceTransformer
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    return SentenceTransformer(model, device='cpu')
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Row-normalized embedding matrices stored as float32, float16 or int8.
+
+int8 rows keep one float32 scale each (symmetric, max-abs), so a 384-dim
+MiniLM row takes 388 bytes instead of 1536. The similarity kernel works on
+the stored form a block of rows at a time, so the full float32 matrix is
+never materialized.
+"""
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+DTYPES = ('float32', 'float16', 'int8')
+
+# Rows dequantized per block in `similarity`; bounds temporary memory
+BLOCK_ROWS = 8192
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (float32, in place when already float32)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.maximum(norms, 1e-12)
+    return matrix
+
+
+class Embeddings:
+    """
+    Row-normalized embedding matrix in one of `DTYPES`.
+
+    Cosine similarity against normalized queries is a dot product, so the
+    kernel is `(rows @ queries.T) * scale` for int8 and a plain product for
+    the float types.
+    """
+
+    def __init__(self, values: np.ndarray, scales: Optional[np.ndarray] = None):
+        if values.dtype.name not in DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {values.dtype}")
+        if (values.dtype == np.int8) != (scales is not None):
+            raise ValueError("int8 embeddings need per-row scales (and only int8 does)")
+        self.values = values
+        self.scales = scales
+
+    @classmethod
+    def empty(cls, rows: int, dim: int, dtype: str = 'float32') -> 'Embeddings':
+        scales = np.ones(rows, dtype=np.float32) if dtype == 'int8' else None
+        return cls(np.zeros((rows, dim), dtype=dtype), scales)
+
+    @classmethod
+    def quantize(cls, matrix: np.ndarray, dtype: str = 'float32') -> 'Embeddings':
+        """Normalize float rows and store them as `dtype`."""
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}, got {dtype!r}")
+        matrix = normalize(np.array(matrix, dtype=np.float32))
+        if dtype == 'float32':
+            return cls(matrix)
+        if dtype == 'float16':
+            return cls(matrix.astype(np.float16))
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        values = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return cls(values, scales.astype(np.float32))
+
+    @property
+    def dtype(self) -> str:
+        return self.values.dtype.name
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def assign(self, rows: np.ndarray, other: 'Embeddings'):
+        """Write `other`'s rows (same dtype) at positions `rows`."""
+        self.values[rows] = other.values
+        if self.scales is not None:
+            self.scales[rows] = other.scales
+
+    def take(self, indices: np.ndarray) -> 'Embeddings':
+        return Embeddings(
+            self.values[indices], self.scales[indices] if self.scales is not None else None
+        )
+
+    def to_float32(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Dequantize rows [start, stop). Float32 storage is returned without a copy."""
+        values = self.values[start:stop]
+        if self.dtype == 'float32':
+            return values
+        out = values.astype(np.float32)
+        if self.scales is not None:
+            out *= self.scales[start:stop, None]
+        return out
+
+    def similarity(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of normalized queries against every row.
+
+        Args:
+            queries: (q, dim) or (dim,) float array; normalized here
+
+        Returns:
+            (q, rows) float32 scores
+        """
+        queries = normalize(np.atleast_2d(np.array(queries, dtype=np.float32)))
+        if self.dtype == 'float32':
+            return queries @ self.values.T
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = self.values[start:start + BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def top_k(self, queries: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, scores) of the `k` most similar rows per query, best first."""
+        scores = self.similarity(queries)
+        k = min(k, scores.shape[1])
+        if k == 0:
+            empty = np.empty((len(scores), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def save(self, path: str):
+        """Write to a `.npz` file."""
+        arrays = {'values': self.values}
+        if self.scales is not None:
+            arrays['scales'] = self.scales
+        with open(Path(path), 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'Embeddings':
+        with np.load(Path(path)) as data:
+            return cls(data['values'], data['scales'] if 'scales' in data else None)
@@ -4,36 +4,50 @@
 import json
 import logging
 import hashlib
-from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict
-from collections import defaultdict
+from typing import List, Dict, Union
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.cluster import DBSCAN
 from sklearn.preprocessing import StandardScaler
 
+from research.embeddings import MAX_CHARS, EmbeddingEngine, Embeddings, pr_text
+from research.instrumentation import metrics
+from research.models.pr import DiffAnalysis, DiffColumns
+
 logger = logging.getLogger(__name__)
 
-@dataclass
-class DiffAnalysis:
-    """Analysis of a single diff."""
-    pr_id: str
-    repo: str
-    title: str
-    merge_time_hours: float
-    discussion_density: float
-    is_security: bool
-    was_reverted: bool
-    fingerprint: str
+# Evidence for a cluster with no known merge time (all squash merges mined
+# without the API): no merge-velocity credit rather than a guessed speed
+UNKNOWN_MERGE_HOURS = 24.0
 
 class PatternExtractor:
     """Extract patterns from collected PR data."""
 
-    def __init__(self, input_file: str = "data/raw_prs.jsonl"):
+    def __init__(
+        self,
+        input_file: str = "data/raw_prs.jsonl",
+        embedder=None,
+        eps: float = 0.5,
+        min_samples: int = 3,
+    ):
+        """
+        Args:
+            input_file: PR JSONL from a collector
+            embedder: An EmbeddingEngine, or a model spec / object with
+                `encode` to wrap in a single-process engine
+            eps: DBSCAN neighbourhood radius
+            min_samples: DBSCAN core point threshold
+        """
         self.input_file = Path(input_file)
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+        if isinstance(embedder, EmbeddingEngine):
+            self.engine = embedder
+        elif embedder is not None:
+            self.engine = EmbeddingEngine(embedder)
+        else:
+            self.engine = EmbeddingEngine()
+        self.eps = eps
+        self.min_samples = min_samples
         logger.info(f"Initialized pattern extractor")
 
     def load_prs(self) -> List[Dict]:
@@ -50,63 +64,134 @@ class PatternExtractor:
         logger.info(f"Loaded {len(prs)} PRs")
         return prs
 
-    def extract_patterns(self) -> List[Dict]:
-        """Complete extraction pipeline."""
-        prs = self.load_prs()
-        if not prs:
-            return []
+    @staticmethod
+    def analyze_pr(pr: Dict) -> DiffAnalysis:
+        """Reduce a raw PR record to the fields used for clustering."""
+        return DiffAnalysis(
+            pr_id=f"{pr['owner']}/{pr['repo']}#{pr['pr_number']}",
+            repo=f"{pr['owner']}/{pr['repo']}",
+            title=pr['title'],
+            body=(pr.get('body') or '')[:MAX_CHARS],
+            merge_time_hours=pr['merge_time_hours'],
+            discussion_density=pr.get('review_comments', 0) / max(pr['additions'] + pr['deletions'], 1),
+            is_security=pr['is_security_related'],
+            was_reverted=pr['has_revert'],
+            fingerprint=hashlib.sha256(pr['title'].encode()).hexdigest()[:16]
+        )
+
+    def embed(self, diffs: Union[DiffColumns, List[DiffAnalysis]]) -> Embeddings:
+        """Embed each diff's title and body, in input order."""
+        if isinstance(diffs, DiffColumns):
+            texts = [pr_text(t, b) for t, b in zip(diffs.titles, diffs.bodies)]
+        else:
+            texts = [pr_text(d.title, d.body) for d in diffs]
+        metrics.inc('extractor_texts_embedded_total', len(texts))
+        with metrics.timer('extractor_embed_seconds'):
+            return self.engine.encode(texts)
+
+    @staticmethod
+    def cluster_patterns(
+        diffs: Union[DiffColumns, List[DiffAnalysis]],
+        embeddings: Union[Embeddings, np.ndarray],
+        eps: float = 0.5,
+        min_samples: int = 3,
+        in_place: bool = False,
+    ) -> List[Dict]:
+        """
+        Cluster embedded diffs and summarize each cluster's evidence.
+
+        Embeddings are standardized on a float32 copy; quantized ones are
+        dequantized into that copy. Callers that own float32 embeddings
+        and no longer need them can pass `in_place=True` to skip the copy,
+        which overwrites them with standardized values. Each pattern
+        carries its normalized `centroid` in the original embedding space
+        for nearest-pattern lookup.
+        """
+        if not isinstance(diffs, DiffColumns):
+            diffs = DiffColumns.from_diffs(diffs)
+        if isinstance(embeddings, Embeddings):
+            # Dequantizing already makes a new array
+            in_place = in_place or embeddings.dtype != 'float32'
+            embeddings = embeddings.to_float32()
+        if not in_place:
+            embeddings = np.array(embeddings, dtype=np.float32)
         
-        # Analyze
-        diffs = []
-        for pr in prs:
-            diff = DiffAnalysis(
-                pr_id=f"{pr['owner']}/{pr['repo']}#{pr['pr_number']}",
-                repo=f"{pr['owner']}/{pr['repo']}",
-                title=pr['title'],
-                merge_time_hours=pr['merge_time_hours'],
-                discussion_density=pr.get('review_comments', 0) / max(pr['additions'] + pr['deletions'], 1),
-                is_security=pr['is_security_related'],
-                was_reverted=pr['has_revert'],
-                fingerprint=hashlib.sha256(pr['title'].encode()).hexdigest()[:16]
-            )
-            diffs.append(diff)
+        with metrics.timer('extractor_cluster_seconds'):
+            scaler = StandardScaler(copy=False)
+            scaler.fit_transform(embeddings)
+            
+            clustering = DBSCAN(eps=eps, min_samples=min_samples, metric='cosine')
+            labels = clustering.fit_predict(embeddings)
+        metrics.inc('extractor_prs_clustered_total', len(diffs))
         
-        # Cluster
-        texts = [d.title for d in diffs]
-        embeddings = self.embedder.encode(texts)
-        scaler = StandardScaler()
-        embeddings_scaled = scaler.fit_transform(embeddings)
+        # Group member indices by label without per-PR Python objects
+        members = np.flatnonzero(labels != -1)
+        members = members[np.argsort(labels[members], kind='stable')]
+        cluster_ids, starts = np.unique(labels[members], return_index=True)
         
-        clustering = DBSCAN(eps=0.5, min_samples=3, metric='cosine')
-        labels = clustering.fit_predict(embeddings_scaled)
+        merge_time_hours = diffs.merge_time_hours[:len(diffs)]
+        discussion_density = diffs.discussion_density[:len(diffs)]
+        was_reverted = diffs.was_reverted
+        repo_id = diffs.repo_id[:len(diffs)]
         
-        # Extract patterns
         patterns = []
-        clusters = defaultdict(list)
-        for idx, label in enumerate(labels):
-            if label != -1:
-                clusters[label].append(idx)
-        
-        for cluster_id, indices in clusters.items():
+        for cluster_id, indices in zip(cluster_ids, np.split(members, starts[1:])):
             if len(indices) < 3:
                 continue
             
-            cluster_diffs = [diffs[i] for i in indices]
-            merge_times = [d.merge_time_hours for d in cluster_diffs]
-            revert_count = sum(1 for d in cluster_diffs if d.was_reverted)
-            repos = set(d.repo for d in cluster_diffs)
+            hours = merge_time_hours[indices]
+            hours = hours[~np.isnan(hours)]
+            
+            # Scaling is affine, so unscaling the mean gives the raw mean
+            centroid = embeddings[indices].mean(axis=0) * scaler.scale_ + scaler.mean_
+            centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
             
             pattern = {
                 'cluster_id': int(cluster_id),
-                'size': len(cluster_diffs),
+                'size': len(indices),
                 'evidence': {
-                    'occurrence_count': len(cluster_diffs),
-                    'repo_count': len(repos),
-                    'median_merge_hours': float(np.median(merge_times)),
-                    'median_discussion_density': float(np.median([d.discussion_density for d in cluster_diffs])),
-                    'revert_rate': revert_count / len(cluster_diffs),
+                    'occurrence_count': len(indices),
+                    'repo_count': len(np.unique(repo_id[indices])),
+                    'median_merge_hours': float(np.median(hours)) if len(hours) else UNKNOWN_MERGE_HOURS,
+                    'median_discussion_density': float(np.median(discussion_density[indices])),
+                    'revert_rate': int(was_reverted[indices].sum()) / len(indices),
                 },
+                'centroid': centroid.round(6).tolist(),
             }
             patterns.append(pattern)
         
         return patterns
+
+    def extract_patterns(self) -> List[Dict]:
+        """Complete extraction pipeline."""
+        if not self.input_file.exists():
+            logger.warning(f"Input file not found: {self.input_file}")
+            return []
+        
+        # Analyze: stream PRs straight into columns, no list of raw dicts
+        diffs = DiffColumns.from_jsonl(str(self.input_file), self.analyze_pr)
+        logger.info(f"Loaded {len(diffs)} PRs")
+        if not len(diffs):
+            return []
+        
+        # Cluster
+        embeddings = self.embed(diffs)
+        diffs.release_text()
+        return self.cluster_patterns(diffs, embeddings, self.eps, self.min_samples, in_place=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    # One encoder process per CPU
+    extractor = PatternExtractor(input_file="data/raw_prs.jsonl", embedder=EmbeddingEngine(workers=0))
+    patterns = extractor.extract_patterns()
+    
+    output_file = Path("data/extracted_patterns.json")
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w') as f:
+        json.dump(patterns, f, indent=2)
+    logger.info(f"Extracted {len(patterns)} patterns to {output_file}")
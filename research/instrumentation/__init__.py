@@ -0,0 +1,6 @@
+"""Metrics and profiling for the research pipeline and engine."""
+
+from research.instrumentation.metrics import MetricsRegistry, metrics
+from research.instrumentation.profiling import profile
+
+__all__ = ['MetricsRegistry', 'metrics', 'profile']
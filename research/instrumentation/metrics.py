@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Lightweight metrics: counters, histograms and timers.
+
+A single process-wide registry (`metrics`) is disabled by default; every
+recording call returns immediately in that case, so instrumentation can
+stay in hot paths. Worker processes ship their recordings back with
+`drain()` and the parent folds them in with `merge()`.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+# Seconds; the last bucket catches everything
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, float('inf'))
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> Dict:
+        return {
+            'buckets': [b if b != float('inf') else '+Inf' for b in self.buckets],
+            'counts': self.counts,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> '_Histogram':
+        hist = cls([float('inf') if b == '+Inf' else b for b in data['buckets']])
+        hist.counts = list(data['counts'])
+        hist.count = data['count']
+        hist.sum = data['sum']
+        hist.min = data['min'] if data['min'] is not None else float('inf')
+        hist.max = data['max'] if data['max'] is not None else float('-inf')
+        return hist
+
+    def merge(self, other: '_Histogram'):
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class _NullTimer:
+    """Timer used while metrics are disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, labels: Dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Collects counters and histograms keyed by name and labels."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increment a counter."""
+        if not self.enabled:
+            return
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Optional[Sequence[float]] = None, **labels):
+        """Record a value in a histogram. Buckets are fixed on first use."""
+        if not self.enabled:
+            return
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = _Histogram(buckets or DEFAULT_BUCKETS)
+        hist.observe(value)
+
+    def timer(self, name: str, **labels):
+        """Context manager recording elapsed seconds into a histogram."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable copy of all recordings."""
+        return {
+            'counters': {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in self.counters.items()
+            },
+            'histograms': {
+                name: [{'labels': dict(key), **hist.to_dict()} for key, hist in series.items()]
+                for name, series in self.histograms.items()
+            },
+        }
+
+    def drain(self) -> Dict:
+        """Snapshot and reset (used by long-lived worker processes)."""
+        snapshot = self.snapshot()
+        self.reset()
+        return snapshot
+
+    def merge(self, snapshot: Dict):
+        """Fold another registry's snapshot into this one."""
+        for name, series in snapshot.get('counters', {}).items():
+            target = self.counters.setdefault(name, {})
+            for item in series:
+                key = _label_key(item['labels'])
+                target[key] = target.get(key, 0) + item['value']
+        for name, series in snapshot.get('histograms', {}).items():
+            target = self.histograms.setdefault(name, {})
+            for item in series:
+                key = _label_key(item['labels'])
+                hist = _Histogram.from_dict(item)
+                if key in target:
+                    target[key].merge(hist)
+                else:
+                    target[key] = hist
+
+    def write_json(self, path: str, extra: Optional[Dict] = None):
+        """Write a run report."""
+        report = {'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), **(extra or {})}
+        report.update(self.snapshot())
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render in the Prometheus text exposition format."""
+        def fmt_labels(key: LabelKey, extra: Tuple = ()) -> str:
+            pairs = list(key) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+        lines = []
+        for name in sorted(self.counters):
+            lines.append(f'# TYPE {name} counter')
+            for key, value in sorted(self.counters[name].items()):
+                lines.append(f'{name}{fmt_labels(key)} {value}')
+        for name in sorted(self.histograms):
+            lines.append(f'# TYPE {name} histogram')
+            for key, hist in sorted(self.histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{fmt_labels(key, (("le", le),))} {cumulative}')
+                if hist.buckets[-1] != float('inf'):
+                    lines.append(f'{name}_bucket{fmt_labels(key, (("le", "+Inf"),))} {hist.count}')
+                lines.append(f'{name}_sum{fmt_labels(key)} {hist.sum}')
+                lines.append(f'{name}_count{fmt_labels(key)} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.to_prometheus())
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Opt-in per-stage cProfile dumps."""
+
+import cProfile
+import io
+import logging
+import pstats
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def profile(stage: str, output_dir: Optional[str]):
+    """
+    Profile the enclosed block if `output_dir` is set.
+
+    Writes `<stage>.prof` (load with pstats, or render as a flame graph
+    with snakeviz / flameprof) and `<stage>.txt` (top functions by
+    cumulative time).
+    """
+    if not output_dir:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        out = Path(output_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(out / f"{stage}.prof"))
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(30)
+        (out / f"{stage}.txt").write_text(summary.getvalue())
+        logger.info(f"Profile for {stage} written to {out / f'{stage}.prof'}")
@@ -0,0 +1,216 @@
+"""PR and diff records.
+
+`PRMetadata` and `DiffAnalysis` are slotted, so a record carries no
+per-instance `__dict__`. `DiffColumns` stores many diffs as NumPy columns
+with interned repository names, which is what extraction works on at scale.
+"""
+
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class PRMetadata:
+    """Complete metadata for a single PR."""
+    __slots__ = (
+        'repo', 'owner', 'pr_number', 'title', 'body', 'created_at', 'merged_at',
+        'closed_at', 'merge_time_hours', 'author', 'files_changed', 'additions',
+        'deletions', 'comments', 'review_comments', 'commits', 'labels', 'merged',
+        'is_security_related', 'has_revert', 'revert_time_hours',
+    )
+    repo: str
+    owner: str
+    pr_number: int
+    title: str
+    body: str
+    # None when unknown (squash merges mined from git)
+    created_at: Optional[str]
+    merged_at: str
+    closed_at: str
+    merge_time_hours: Optional[float]
+    author: str
+    files_changed: int
+    additions: int
+    deletions: int
+    comments: int
+    review_comments: int
+    commits: int
+    labels: List[str]
+    merged: bool
+    is_security_related: bool
+    has_revert: bool
+    revert_time_hours: Optional[float]
+
+    def __post_init__(self):
+        # Repo/owner/author repeat across thousands of records
+        self.repo = sys.intern(self.repo)
+        self.owner = sys.intern(self.owner)
+        self.author = sys.intern(self.author)
+
+
+@dataclass
+class DiffAnalysis:
+    """Analysis of a single diff."""
+    __slots__ = (
+        'pr_id', 'repo', 'title', 'body', 'merge_time_hours', 'discussion_density',
+        'is_security', 'was_reverted', 'fingerprint',
+    )
+    pr_id: str
+    repo: str
+    title: str
+    body: str
+    merge_time_hours: Optional[float]
+    discussion_density: float
+    is_security: bool
+    was_reverted: bool
+    fingerprint: str
+
+
+# Bit flags in DiffColumns.flags
+FLAG_SECURITY = 1
+FLAG_REVERTED = 2
+
+
+class DiffColumns:
+    """
+    Struct-of-arrays store of diff analyses.
+
+    Numeric fields live in NumPy columns (about 22 bytes per PR), repository
+    names are stored once and referenced by id, and titles and bodies are
+    kept in plain lists that can be dropped with `release_text()` once
+    embedded.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.repos: List[str] = []
+        self._repo_ids: Dict[str, int] = {}
+        self.titles: Optional[List[str]] = []
+        self.bodies: Optional[List[str]] = []
+        self.repo_id = np.empty(capacity, dtype=np.int32)
+        self.pr_number = np.empty(capacity, dtype=np.int32)
+        self.merge_time_hours = np.empty(capacity, dtype=np.float32)
+        self.discussion_density = np.empty(capacity, dtype=np.float32)
+        self.fingerprint = np.empty(capacity, dtype=np.uint64)
+        self.flags = np.empty(capacity, dtype=np.uint8)
+        self._size = 0
+
+    _COLUMNS = ('repo_id', 'pr_number', 'merge_time_hours', 'discussion_density', 'fingerprint', 'flags')
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self.repo_id))
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def trim(self):
+        """Drop unused capacity."""
+        for name in self._COLUMNS:
+            setattr(self, name, getattr(self, name)[:self._size].copy())
+
+    def append(self, diff: DiffAnalysis):
+        if self._size == len(self.repo_id):
+            self._grow()
+        i = self._size
+        repo_id = self._repo_ids.get(diff.repo)
+        if repo_id is None:
+            repo_id = self._repo_ids[diff.repo] = len(self.repos)
+            self.repos.append(sys.intern(diff.repo))
+        self.repo_id[i] = repo_id
+        self.pr_number[i] = int(diff.pr_id.rsplit('#', 1)[1])
+        # Unknown merge times are stored as NaN
+        self.merge_time_hours[i] = diff.merge_time_hours if diff.merge_time_hours is not None else np.nan
+        self.discussion_density[i] = diff.discussion_density
+        self.fingerprint[i] = int(diff.fingerprint, 16)
+        self.flags[i] = (FLAG_SECURITY if diff.is_security else 0) | (FLAG_REVERTED if diff.was_reverted else 0)
+        self.titles.append(diff.title)
+        self.bodies.append(diff.body)
+        self._size += 1
+
+    @classmethod
+    def from_diffs(cls, diffs: Iterable[DiffAnalysis]) -> 'DiffColumns':
+        columns = cls()
+        for diff in diffs:
+            columns.append(diff)
+        columns.trim()
+        return columns
+
+    @classmethod
+    def from_jsonl(cls, path: str, analyze) -> 'DiffColumns':
+        """
+        Stream a PR JSONL file into columns.
+
+        Args:
+            path: JSONL of PRMetadata dicts
+            analyze: Callable turning a PR dict into a DiffAnalysis
+        """
+        columns = cls()
+        with open(Path(path), 'r') as f:
+            for line in f:
+                if line.strip():
+                    columns.append(analyze(json.loads(line)))
+        columns.trim()
+        return columns
+
+    def take(self, indices: np.ndarray) -> 'DiffColumns':
+        """New store with rows reordered/selected by `indices`."""
+        out = DiffColumns(capacity=0)
+        out.repos = self.repos
+        out._repo_ids = self._repo_ids
+        out.titles = [self.titles[i] for i in indices] if self.titles is not None else None
+        out.bodies = [self.bodies[i] for i in indices] if self.bodies is not None else None
+        for name in self._COLUMNS:
+            setattr(out, name, getattr(self, name)[:self._size][indices])
+        out._size = len(indices)
+        return out
+
+    def sort_order(self) -> np.ndarray:
+        """Row order by (repo, pr_number); independent of arrival order."""
+        repo_rank = np.empty(len(self.repos), dtype=np.int32)
+        repo_rank[np.argsort(np.array(self.repos, dtype=object))] = np.arange(len(self.repos))
+        return np.lexsort((self.pr_number[:self._size], repo_rank[self.repo_id[:self._size]]))
+
+    def release_text(self):
+        """Free title and body strings (e.g. after embedding)."""
+        self.titles = None
+        self.bodies = None
+
+    @property
+    def is_security(self) -> np.ndarray:
+        return (self.flags[:self._size] & FLAG_SECURITY) != 0
+
+    @property
+    def was_reverted(self) -> np.ndarray:
+        return (self.flags[:self._size] & FLAG_REVERTED) != 0
+
+    def __getitem__(self, i: int) -> DiffAnalysis:
+        """Materialize one record."""
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        repo = self.repos[self.repo_id[i]]
+        flags = int(self.flags[i])
+        merge_time_hours = float(self.merge_time_hours[i])
+        return DiffAnalysis(
+            pr_id=f"{repo}#{int(self.pr_number[i])}",
+            repo=repo,
+            title=self.titles[i] if self.titles is not None else '',
+            body=self.bodies[i] if self.bodies is not None else '',
+            merge_time_hours=None if np.isnan(merge_time_hours) else merge_time_hours,
+            discussion_density=float(self.discussion_density[i]),
+            is_security=bool(flags & FLAG_SECURITY),
+            was_reverted=bool(flags & FLAG_REVERTED),
+            fingerprint=f"{int(self.fingerprint[i]):016x}",
+        )
+
+    def __iter__(self) -> Iterator[DiffAnalysis]:
+        for i in range(self._size):
+            yield self[i]
@@ -0,0 +1 @@
+"""Streaming, cached research pipeline."""
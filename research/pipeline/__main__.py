@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Run the research pipeline: collect -> analyze -> cluster -> score.
+
+Usage:
+    python -m research.pipeline --workers 8 --weight stability=0.35
+    python -m research.pipeline --mirror nodejs/node=/srv/mirrors/node.git
+    python -m research.pipeline --refresh
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from research.embeddings import DTYPES
+from research.instrumentation import metrics
+from research.pipeline.runner import PipelineRunner, Stage
+from research.pipeline.stages import analyze_stage, cluster_stage, collect_stage, score_stage
+
+logger = logging.getLogger(__name__)
+
+# Research targets: high-quality open source with security focus
+TARGET_REPOS = [
+    "eslint/eslint",
+    "prettier/prettier",
+    "typescript-eslint/typescript-eslint",
+    "nodejs/node",
+]
+
+
+def build_stages(args: argparse.Namespace) -> List[Stage]:
+    """Pipeline stages for the given command line."""
+    weights = None
+    if args.weight:
+        from research.scoring.confidence_scorer import ConfidenceScorer
+        weights = dict(ConfidenceScorer.WEIGHTS)
+        for item in args.weight:
+            name, value = item.split('=')
+            if name not in weights:
+                raise SystemExit(f"Unknown weight: {name}")
+            weights[name] = float(value)
+
+    shard_by = ('owner', 'repo')
+    return [
+        Stage('collect', collect_stage, {
+            'max_prs_per_repo': args.max_prs_per_repo,
+            'min_merge_time_hours': args.min_merge_time_hours,
+        }, workers=args.workers, shard_by=shard_by),
+        Stage('analyze', analyze_stage, {'model_name': args.model, 'dtype': args.embedding_dtype},
+              workers=args.workers, shard_by=shard_by),
+        Stage('cluster', cluster_stage, {'eps': args.eps, 'min_samples': args.min_samples}),
+        Stage('score', score_stage, {'weights': weights}),
+    ]
+
+
+def build_seed(repos: List[str], mirrors: List[str], as_of: str) -> List[Dict]:
+    """
+    Seed records for the collect stage.
+
+    API seeds carry `as_of` (the collection date by default) and mirror seeds
+    the mirror's HEAD sha, so a new day's collection or fetching new history
+    into a mirror invalidates the cached collect stage and everything after it.
+    """
+    seed = [{**dict(zip(('owner', 'repo'), spec.split('/'))), 'as_of': as_of} for spec in repos]
+    for item in mirrors:
+        spec, path = item.split('=', 1)
+        owner, repo = spec.split('/')
+        head = subprocess.run(
+            ['git', '-C', path, 'rev-parse', 'HEAD'], check=True, capture_output=True, text=True
+        ).stdout.strip()
+        seed.append({'owner': owner, 'repo': repo, 'mirror': os.path.abspath(path), 'head': head})
+    return seed
+
+
+def _write_json(path: Path, records: List[Dict]):
+    with open(path, 'w') as f:
+        json.dump(records, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repos', nargs='+', help='owner/repo list collected via the GitHub API')
+    parser.add_argument('--mirror', action='append', default=[],
+                        help='Collect owner/repo from a local git mirror, e.g. nodejs/node=/srv/node.git')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--cache-dir', default='data/cache')
+    parser.add_argument('--as-of', default=datetime.now(timezone.utc).strftime('%Y-%m-%d'),
+                        help='Collection date for API repos; cached PRs are reused only for the same date')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-collect and replace the cached collection for this date')
+    parser.add_argument('--output-dir', default='data')
+    parser.add_argument('--max-prs-per-repo', type=int, default=100)
+    parser.add_argument('--min-merge-time-hours', type=float, default=0.5)
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help='SentenceTransformer name, or "hashing" for the offline stub')
+    parser.add_argument('--embedding-dtype', choices=DTYPES, default='float32',
+                        help='Store embeddings quantized (int8 is ~4x smaller than float32)')
+    parser.add_argument('--eps', type=float, default=0.5)
+    parser.add_argument('--min-samples', type=int, default=3)
+    parser.add_argument('--weight', action='append', default=[], help='Override a score weight, e.g. stability=0.35')
+    parser.add_argument('--metrics-out', help='Write a JSON run report here')
+    parser.add_argument('--prometheus-out', help='Write Prometheus text metrics here')
+    parser.add_argument('--profile', dest='profile_dir', help='Dump cProfile data per stage worker here')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if args.metrics_out or args.prometheus_out:
+        metrics.enable()
+
+    if args.repos is None:
+        args.repos = [] if args.mirror else TARGET_REPOS
+    seed = build_seed(args.repos, args.mirror, args.as_of)
+    runner = PipelineRunner(build_stages(args), cache_dir=args.cache_dir, profile_dir=args.profile_dir)
+    if args.refresh:
+        # Replace this date's collection rather than caching under a new key
+        runner.invalidate(seed, 'collect')
+    scored = list(runner.run(seed))
+
+    # Same artifacts the step-by-step entry points produce
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'raw_prs.jsonl', 'w') as f:
+        for record in runner.stage_output('collect', seed):
+            f.write(json.dumps(record) + '\n')
+    _write_json(output_dir / 'extracted_patterns.json', list(runner.stage_output('cluster', seed)))
+    _write_json(output_dir / 'scored_patterns.json', scored)
+    logger.info(f"Scored {len(scored)} patterns to {output_dir / 'scored_patterns.json'}")
+
+    if args.metrics_out:
+        metrics.write_json(args.metrics_out, {
+            'command': 'research.pipeline', 'repos': args.repos, 'mirrors': args.mirror,
+        })
+    if args.prometheus_out:
+        metrics.write_prometheus(args.prometheus_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Streaming, sharded pipeline runner.
+
+Stages are connected by bounded multiprocessing queues and stream dict
+records. A stage can run as several worker processes; records are routed
+to a worker by a stable hash of `shard_by` fields, so e.g. every PR of a
+repository lands on the same worker. Each stage's output is cached under a
+content hash of its parameters and of the upstream stage's cache key, so a
+re-run only recomputes stages whose inputs or parameters changed.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing as mp
+import queue
+import shutil
+import threading
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from research.instrumentation import metrics, profile
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker sent by every upstream worker to every downstream queue
+_END = None
+
+
+@dataclass
+class Stage:
+    """A pipeline stage: `func(records, **params)` yields output records."""
+    name: str
+    func: Callable[..., Iterable[Dict]]
+    params: Dict = field(default_factory=dict)
+    workers: int = 1
+    shard_by: Tuple[str, ...] = ()
+    version: str = "1"  # Bump to invalidate caches after changing `func`
+
+
+def _shard(record: Dict, shard_by: Tuple[str, ...], n: int) -> int:
+    """Stable shard index for a record."""
+    if n == 1:
+        return 0
+    key = '/'.join(str(record.get(f, '')) for f in shard_by)
+    return zlib.crc32(key.encode()) % n
+
+
+def _stage_worker(
+    stage: Stage,
+    inbox: mp.Queue,
+    upstream_count: int,
+    outboxes: List[mp.Queue],
+    downstream_shard_by: Tuple[str, ...],
+    part_dir: str,
+    worker_index: int,
+    metrics_enabled: bool,
+    profile_dir: Optional[str],
+):
+    """Worker process: run one shard of a stage and fan out to the next."""
+    # Forked workers inherit the parent's recordings; start clean
+    metrics.reset()
+    metrics.enabled = metrics_enabled
+
+    def records() -> Iterator[Dict]:
+        remaining = upstream_count
+        while remaining:
+            record = inbox.get()
+            if record is _END:
+                remaining -= 1
+            else:
+                yield record
+
+    part_file = Path(part_dir) / f"part-{worker_index:03d}.jsonl"
+    count = 0
+    with open(part_file, 'w') as f, profile(f"{stage.name}-{worker_index}", profile_dir):
+        with metrics.timer('pipeline_stage_seconds', stage=stage.name):
+            for record in stage.func(records(), **stage.params):
+                f.write(json.dumps(record) + '\n')
+                outboxes[_shard(record, downstream_shard_by, len(outboxes))].put(record)
+                count += 1
+    metrics.inc('pipeline_records_total', count, stage=stage.name)
+    if metrics_enabled:
+        with open(Path(part_dir) / f"metrics-{worker_index:03d}.json", 'w') as f:
+            json.dump(metrics.drain(), f)
+    for outbox in outboxes:
+        outbox.put(_END)
+
+
+class PipelineRunner:
+    """Run a chain of stages with per-stage output caching."""
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        cache_dir: str = "data/cache",
+        queue_size: int = 1000,
+        profile_dir: Optional[str] = None,
+    ):
+        """
+        Initialize runner.
+
+        Args:
+            stages: Stages in execution order
+            cache_dir: Where stage outputs are cached
+            queue_size: Max records buffered between two stages per worker
+            profile_dir: If set, each stage worker dumps a cProfile there
+        """
+        self.stages = stages
+        self.cache_dir = Path(cache_dir)
+        self.queue_size = queue_size
+        self.profile_dir = profile_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def stage_keys(self, seed: List[Dict]) -> List[str]:
+        """Content-hash cache key for every stage, chained from the seed."""
+        key = hashlib.sha256(json.dumps(seed, sort_keys=True).encode()).hexdigest()
+        keys = []
+        for stage in self.stages:
+            payload = json.dumps(
+                {'input': key, 'stage': stage.name, 'version': stage.version, 'params': stage.params},
+                sort_keys=True,
+            )
+            key = hashlib.sha256(payload.encode()).hexdigest()
+            keys.append(key)
+        return keys
+
+    def _cache_path(self, stage: Stage, key: str) -> Path:
+        return self.cache_dir / f"{stage.name}-{key[:16]}"
+
+    @staticmethod
+    def _read_cache(path: Path) -> Iterator[Dict]:
+        for part in sorted(path.glob('part-*.jsonl')):
+            with open(part, 'r') as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def stage_output(self, name: str, seed: List[Dict]) -> Iterator[Dict]:
+        """Stream a stage's cached output from the last run with this seed."""
+        for stage, key in zip(self.stages, self.stage_keys(seed)):
+            if stage.name == name:
+                return self._read_cache(self._cache_path(stage, key))
+        raise KeyError(name)
+
+    def invalidate(self, seed: List[Dict], name: str):
+        """Drop the cached output of stage `name` and every stage after it."""
+        names = [stage.name for stage in self.stages]
+        if name not in names:
+            raise KeyError(name)
+        start = names.index(name)
+        for stage, key in list(zip(self.stages, self.stage_keys(seed)))[start:]:
+            shutil.rmtree(self._cache_path(stage, key), ignore_errors=True)
+
+    def run(self, seed: List[Dict]) -> Iterator[Dict]:
+        """
+        Run the pipeline, yielding the last stage's records.
+
+        Stages whose output is already cached for these inputs are skipped;
+        execution resumes from the last cached stage.
+        """
+        keys = self.stage_keys(seed)
+        paths = [self._cache_path(s, k) for s, k in zip(self.stages, keys)]
+
+        start = 0
+        source: Iterable[Dict] = seed
+        for i in reversed(range(len(self.stages))):
+            if paths[i].exists():
+                start = i + 1
+                source = self._read_cache(paths[i])
+                break
+        for stage in self.stages[:start]:
+            logger.info(f"Stage {stage.name}: cached")
+        if start == len(self.stages):
+            yield from source
+            return
+
+        pending = self.stages[start:]
+        tmp_paths = [paths[start + i].with_name(paths[start + i].name + '.tmp') for i in range(len(pending))]
+        for tmp_path in tmp_paths:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            tmp_path.mkdir()
+
+        inboxes = [
+            [mp.Queue(self.queue_size) for _ in range(stage.workers)]
+            for stage in pending
+        ]
+        results: mp.Queue = mp.Queue(self.queue_size)
+        processes = []
+        for i, stage in enumerate(pending):
+            last = i == len(pending) - 1
+            outboxes = [results] if last else inboxes[i + 1]
+            downstream_shard_by = () if last else pending[i + 1].shard_by
+            upstream_count = 1 if i == 0 else pending[i - 1].workers
+            for w in range(stage.workers):
+                process = mp.Process(
+                    target=_stage_worker,
+                    args=(stage, inboxes[i][w], upstream_count, outboxes, downstream_shard_by,
+                          str(tmp_paths[i]), w, metrics.enabled, self.profile_dir),
+                    name=f"{stage.name}-{w}",
+                    daemon=True,
+                )
+                process.start()
+                processes.append(process)
+            logger.info(f"Stage {stage.name}: started {stage.workers} worker(s)")
+
+        def feed():
+            first = pending[0]
+            for record in source:
+                inboxes[0][_shard(record, first.shard_by, first.workers)].put(record)
+            for inbox in inboxes[0]:
+                inbox.put(_END)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+
+        try:
+            remaining = pending[-1].workers
+            while remaining:
+                try:
+                    record = results.get(timeout=0.5)
+                except queue.Empty:
+                    failed = [p.name for p in processes if p.exitcode not in (None, 0)]
+                    if failed:
+                        raise RuntimeError(f"Pipeline worker(s) failed: {', '.join(failed)}")
+                    continue
+                if record is _END:
+                    remaining -= 1
+                else:
+                    yield record
+
+            for process in processes:
+                process.join()
+            failed = [p.name for p in processes if p.exitcode != 0]
+            if failed:
+                raise RuntimeError(f"Pipeline worker(s) failed: {', '.join(failed)}")
+            for tmp_path, path in zip(tmp_paths, paths[start:]):
+                for metrics_file in tmp_path.glob('metrics-*.json'):
+                    with open(metrics_file, 'r') as f:
+                        metrics.merge(json.load(f))
+                    metrics_file.unlink()
+                shutil.rmtree(path, ignore_errors=True)
+                tmp_path.rename(path)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for tmp_path in tmp_paths:
+                shutil.rmtree(tmp_path, ignore_errors=True)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Research pipeline stages: collect -> analyze -> cluster -> score.
+
+Each stage is a module-level generator so it can run in a worker process.
+Heavy imports happen inside the stage so workers only load what they use.
+"""
+
+import logging
+from dataclasses import asdict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _batches(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def collect_stage(
+    records: Iterable[Dict],
+    max_prs_per_repo: int = 100,
+    min_merge_time_hours: float = 0.5,
+    include_security_only: bool = True,
+) -> Iterator[Dict]:
+    """
+    Seed records `{'owner', 'repo'}` -> PR metadata records.
+
+    Seeds carrying a `mirror` path are mined from that local git mirror;
+    the rest go through the GitHub API.
+    """
+    for record in records:
+        spec = f"{record['owner']}/{record['repo']}"
+        if record.get('mirror'):
+            from research.collectors.git_collector import GitMirrorCollector
+            collector = GitMirrorCollector(
+                {spec: record['mirror']},
+                max_prs_per_repo=max_prs_per_repo,
+                min_merge_time_hours=min_merge_time_hours,
+            )
+            logger.info(f"Collecting from {spec} mirror at {record['mirror']}")
+        else:
+            from research.collectors.github_collector import GitHubCollector
+            collector = GitHubCollector(
+                repositories=[spec],
+                max_prs_per_repo=max_prs_per_repo,
+                min_merge_time_hours=min_merge_time_hours,
+            )
+            logger.info(f"Collecting from {spec}")
+        for metadata in collector.iter_repo_prs(record['owner'], record['repo'], include_security_only):
+            yield asdict(metadata)
+
+
+def analyze_stage(
+    records: Iterable[Dict],
+    model_name: str = 'all-MiniLM-L6-v2',
+    batch_size: int = 64,
+    dtype: str = 'float32',
+) -> Iterator[Dict]:
+    """PR records -> DiffAnalysis records with a title + body embedding."""
+    from research.embeddings import EmbeddingEngine
+    from research.extractors.pattern_extractor import PatternExtractor
+
+    # Stage workers already use the cores; encode in-process
+    engine = EmbeddingEngine(model_name, workers=1, batch_size=batch_size, dtype=dtype)
+    extractor = PatternExtractor(embedder=engine)
+    for batch in _batches(records, batch_size * 16):
+        diffs = [extractor.analyze_pr(pr) for pr in batch]
+        embeddings = extractor.embed(diffs)
+        for i, diff in enumerate(diffs):
+            record = {**asdict(diff), 'embedding': embeddings.values[i].tolist()}
+            if embeddings.scales is not None:
+                record['embedding_scale'] = float(embeddings.scales[i])
+            yield record
+
+
+def cluster_stage(
+    records: Iterable[Dict],
+    eps: float = 0.5,
+    min_samples: int = 3,
+) -> Iterator[Dict]:
+    """Analyzed records -> pattern records (needs the whole corpus)."""
+    import numpy as np
+    from research.embeddings import Embeddings
+    from research.extractors.pattern_extractor import PatternExtractor
+    from research.models.pr import DiffAnalysis, DiffColumns
+
+    names = DiffAnalysis.__slots__
+    columns = DiffColumns()
+    rows, scales = [], []
+    for record in records:
+        columns.append(DiffAnalysis(**{n: record[n] for n in names}))
+        rows.append(record['embedding'])
+        scales.append(record.get('embedding_scale'))
+    if not rows:
+        return
+    columns.release_text()
+    # Integer rows are int8 codes with a per-row scale
+    if scales[0] is not None:
+        embeddings = Embeddings(np.array(rows, dtype=np.int8), np.array(scales, dtype=np.float32))
+    else:
+        embeddings = Embeddings(np.array(rows, dtype=np.float32))
+    del rows, scales
+
+    # Shards arrive interleaved; sort so cluster labels are reproducible
+    order = columns.sort_order()
+    yield from PatternExtractor.cluster_patterns(
+        columns.take(order), embeddings.take(order), eps, min_samples, in_place=True
+    )
+
+
+def score_stage(
+    records: Iterable[Dict],
+    weights: Optional[Dict[str, float]] = None,
+) -> Iterator[Dict]:
+    """Pattern records -> patterns with `confidence_scores`."""
+    from research.scoring.confidence_scorer import ConfidenceScorer
+
+    yield from ConfidenceScorer.score_patterns(list(records), weights)
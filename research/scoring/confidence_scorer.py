@@ -4,9 +4,11 @@
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import numpy as np
 
+from research.instrumentation import metrics
+
 logger = logging.getLogger(__name__)
 
 class ConfidenceScorer:
@@ -21,10 +23,8 @@ class ConfidenceScorer:
     }
 
     @staticmethod
-    def score_pattern(pattern: Dict) -> float:
-        """Calculate confidence score for a pattern."""
-        evidence = pattern['evidence']
-        
+    def component_scores(evidence: Dict) -> Dict[str, float]:
+        """Calculate the individual (unweighted) score components."""
         # Merge velocity score
         merge_velocity = min(1.0, max(0.0, 1.0 - (evidence['median_merge_hours'] / 24.0)))
         
@@ -41,13 +41,53 @@ class ConfidenceScorer:
         diversity_ratio = evidence['repo_count'] / max(evidence['occurrence_count'], 1)
         diversity = min(0.95, diversity_ratio * 0.5)
         
+        return {
+            'merge_velocity': float(merge_velocity),
+            'stability': float(stability),
+            'discussion': float(discussion),
+            'frequency': float(frequency),
+            'diversity': float(diversity),
+        }
+
+    @staticmethod
+    def score_pattern(pattern: Dict, weights: Optional[Dict[str, float]] = None) -> float:
+        """Calculate confidence score for a pattern."""
+        weights = weights or ConfidenceScorer.WEIGHTS
+        components = ConfidenceScorer.component_scores(pattern['evidence'])
+        
         # Weighted sum
-        score = (
-            ConfidenceScorer.WEIGHTS['merge_velocity'] * merge_velocity +
-            ConfidenceScorer.WEIGHTS['stability'] * stability +
-            ConfidenceScorer.WEIGHTS['discussion'] * discussion +
-            ConfidenceScorer.WEIGHTS['frequency'] * frequency +
-            ConfidenceScorer.WEIGHTS['diversity'] * diversity
-        )
+        score = sum(weights[name] * value for name, value in components.items())
         
         return max(0.0, min(1.0, score))
+
+    @staticmethod
+    def score_patterns(
+        patterns: List[Dict], weights: Optional[Dict[str, float]] = None
+    ) -> List[Dict]:
+        """Attach `confidence_scores` to each pattern, highest confidence first."""
+        scored = []
+        with metrics.timer('scorer_score_seconds'):
+            for pattern in patterns:
+                scores = ConfidenceScorer.component_scores(pattern['evidence'])
+                scores['overall_confidence'] = ConfidenceScorer.score_pattern(pattern, weights)
+                scored.append({**pattern, 'confidence_scores': scores})
+        metrics.inc('scorer_patterns_scored_total', len(scored))
+        scored.sort(key=lambda p: p['confidence_scores']['overall_confidence'], reverse=True)
+        return scored
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    input_file = Path("data/extracted_patterns.json")
+    output_file = Path("data/scored_patterns.json")
+    with open(input_file, 'r') as f:
+        patterns = json.load(f)
+    
+    scored = ConfidenceScorer.score_patterns(patterns)
+    with open(output_file, 'w') as f:
+        json.dump(scored, f, indent=2)
+    logger.info(f"Scored {len(scored)} patterns to {output_file}")
@@ -0,0 +1,69 @@
+import json
+from urllib.request import urlopen
+
+import pytest
+from engine.benchmarks.generators import generate_prs, generate_repo, generate_sarif
+from engine.benchmarks.run_benchmarks import compare_to_baseline
+from engine.benchmarks.stubs import FakeGitHubServer
+from engine.matcher import TemplateMatcher
+from engine.templates import TemplateRegistry
+
+
+@pytest.fixture
+def registry():
+    return TemplateRegistry.from_directory("templates")
+
+
+def test_pr_corpus_is_deterministic():
+    """Same seed gives the same corpus."""
+    assert list(generate_prs(50, seed=7)) == list(generate_prs(50, seed=7))
+    assert list(generate_prs(50, seed=7)) != list(generate_prs(50, seed=8))
+
+
+def test_synthetic_repo_hits_are_found(tmp_path, registry):
+    """Every seeded template hit is found by the matcher."""
+    seeded = generate_repo(str(tmp_path), list(registry.templates.values()), files=15, seed=3)
+    for template in registry.ranked():
+        assert len(TemplateMatcher(template).scan(str(tmp_path))) == seeded[template['id']]
+
+
+def test_sarif_snippets_match_rules(registry):
+    """Every SARIF result snippet matches its rule's template."""
+    sarif = generate_sarif(30, list(registry.templates.values()))
+    for result in sarif['runs'][0]['results']:
+        snippet = result['locations'][0]['physicalLocation']['region']['snippet']['text']
+        assert TemplateMatcher(registry.get(result['ruleId'])).scan_text(snippet, 'x.js')
+
+
+def test_fake_github_server():
+    """Fake server serves PR list, details and revert search."""
+    prs = [dict(pr, owner='acme', repo='widgets') for pr in generate_prs(5, seed=1, repos=1)]
+    prs[0]['has_revert'], prs[0]['revert_time_hours'] = True, 2.0
+    with FakeGitHubServer(prs) as server:
+        listing = json.load(urlopen(f"{server.url}/repos/acme/widgets/pulls?page=1&per_page=100"))
+        assert sorted(item['number'] for item in listing) == [1, 2, 3, 4, 5]
+
+        detail = json.load(urlopen(f"{server.url}/repos/acme/widgets/pulls/3"))
+        assert detail['title'] == prs[2]['title']
+
+        number = prs[0]['pr_number']
+        search = json.load(urlopen(
+            f"{server.url}/search/issues?q=repo:acme/widgets+type:pr+in:body+%23{number}"
+        ))
+        assert search['items'][0]['title'].startswith('Revert')
+
+
+def test_compare_to_baseline():
+    """Only slowdowns beyond the threshold are regressions."""
+    baseline = {'scan': {'normalized': 1.0}, 'fix': {'normalized': 1.0}}
+    results = {
+        'calibration': {'normalized': 1.0},
+        'scan': {'normalized': 1.2},
+        'fix': {'normalized': 1.5},
+        'sarif': {'normalized': 9.0},  # No baseline yet
+    }
+    regressions = compare_to_baseline(results, baseline, threshold=0.25)
+    assert len(regressions) == 1 and regressions[0].startswith('fix')
+
+    baseline['fix']['threshold'] = 0.6
+    assert compare_to_baseline(results, baseline, threshold=0.25) == []
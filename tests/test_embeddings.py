@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from research.embeddings import EmbeddingEngine, Embeddings, HashingModel, pr_text
+
+TEXTS = [
+    "Fix XSS in template rendering",
+    "Escape user input before writing it to the DOM to prevent script injection",
+    "Bump lodash",
+    "Remove hardcoded API key from config and read it from the environment",
+    "Docs: update README",
+] * 7
+
+
+def test_hashing_model_is_deterministic():
+    """Same text, same vector; rows are unit length."""
+    model = HashingModel(dim=64)
+    first, second = model.encode(TEXTS), HashingModel(dim=64).encode(TEXTS)
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+
+
+def test_engine_preserves_input_order():
+    """Length bucketing does not reorder the output rows."""
+    engine = EmbeddingEngine('hashing', batch_size=4)
+    expected = HashingModel().encode(TEXTS)
+    assert np.allclose(engine.encode(TEXTS).values, expected, atol=1e-6)
+
+
+def test_engine_buckets_by_length():
+    """Each bucket holds texts of similar length, longest first."""
+    engine = EmbeddingEngine('hashing', batch_size=5)
+    lengths = [len(TEXTS[i]) for bucket in engine.buckets(TEXTS) for i in bucket]
+    assert lengths == sorted(lengths, reverse=True)
+
+
+def test_engine_workers_match_single_process():
+    """Encoding across worker processes gives the same matrix."""
+    single = EmbeddingEngine('hashing', batch_size=4, dtype='int8').encode(TEXTS)
+    parallel = EmbeddingEngine('hashing', workers=2, batch_size=4, dtype='int8').encode(TEXTS)
+    assert np.array_equal(single.values, parallel.values)
+    assert np.array_equal(single.scales, parallel.scales)
+
+
+@pytest.mark.parametrize('dtype,ratio', [('float16', 2), ('int8', 3.5)])
+def test_quantized_similarity_tracks_float32(dtype, ratio):
+    """Quantized kernels agree with float32 and use less memory."""
+    matrix = np.random.default_rng(0).normal(size=(500, 384)).astype(np.float32)
+    exact = Embeddings.quantize(matrix)
+    quantized = Embeddings.quantize(matrix, dtype)
+    queries = matrix[:10]
+    assert np.allclose(quantized.similarity(queries), exact.similarity(queries), atol=0.01)
+    assert exact.nbytes / quantized.nbytes >= ratio
+
+    indices, scores = quantized.top_k(queries, k=3)
+    assert indices[:, 0].tolist() == list(range(10))
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+def test_embeddings_save_load(tmp_path):
+    """int8 matrices round-trip with their scales."""
+    embeddings = Embeddings.quantize(HashingModel().encode(TEXTS), 'int8')
+    embeddings.save(str(tmp_path / 'e.npz'))
+    loaded = Embeddings.load(str(tmp_path / 'e.npz'))
+    assert loaded.dtype == 'int8'
+    assert np.array_equal(loaded.values, embeddings.values)
+    assert np.array_equal(loaded.scales, embeddings.scales)
+
+
+def test_pr_text_includes_body():
+    """Body follows the title and is truncated."""
+    assert pr_text('Fix XSS', 'Escape output.') == 'Fix XSS\n\nEscape output.'
+    assert pr_text('Fix XSS', None) == 'Fix XSS'
+    assert len(pr_text('t', 'x' * 5000, max_chars=100)) == 100
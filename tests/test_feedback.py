@@ -0,0 +1,203 @@
+import hashlib
+import hmac
+import json
+import random
+import statistics
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+from engine.feedback.sketch import P2Quantile
+from engine.feedback.sources import EventLog, events_from_github, verify_signature
+from engine.feedback.store import FeedbackStore
+from engine.fleet.stages import TEMPLATE_MARKER
+from engine.lookup.index import PatternIndex
+from engine.lookup.server import LookupServer
+from engine.templates import TemplateRegistry
+from research.embeddings import EmbeddingEngine
+
+
+@pytest.fixture
+def registry():
+    return TemplateRegistry.from_directory("templates")
+
+
+def merged(number, template_id='SECRETS_001', hours=30.0, repo='org/app'):
+    return {'type': 'merged', 'template_id': template_id, 'repo': repo, 'pr_number': number,
+            'merge_time_hours': hours, 'discussion_density': 0.5}
+
+
+def github_payload(number, body, merged=True):
+    return {
+        'action': 'closed',
+        'repository': {'full_name': 'org/app'},
+        'pull_request': {
+            'number': number, 'merged': merged, 'body': body,
+            'created_at': '2026-01-01T00:00:00Z', 'merged_at': '2026-01-01T06:00:00Z',
+            'review_comments': 2, 'additions': 3, 'deletions': 1,
+        },
+    }
+
+
+def test_p2_median_tracks_exact_median():
+    """P² estimate stays close to the exact median of a skewed stream."""
+    rng = random.Random(0)
+    values = [rng.expovariate(0.5) for _ in range(20000)]
+    sketch = P2Quantile(0.5)
+    for value in values:
+        sketch.add(value)
+    assert sketch.value == pytest.approx(statistics.median(values), rel=0.02)
+    assert P2Quantile.from_dict(sketch.to_dict()).value == sketch.value
+
+
+def test_only_affected_templates_rescored(registry):
+    """Events re-score just their templates, and bad outcomes lower confidence."""
+    store = FeedbackStore(registry)
+    before = dict(store.scores)
+    events = [merged(n) for n in range(200)]
+    events += [{'type': 'reverted', 'repo': 'org/app', 'pr_number': n} for n in range(50)]
+    updated = store.ingest(events)
+
+    assert list(updated) == ['SECRETS_001']
+    assert updated['SECRETS_001']['overall_confidence'] < before['SECRETS_001']['overall_confidence']
+    assert store.scores['DEPS_001'] == before['DEPS_001']
+    evidence = store.templates['SECRETS_001'].evidence()
+    assert evidence['occurrence_count'] == 234 + 200
+    assert evidence['revert_rate'] == pytest.approx(50 / 434)
+
+
+def test_duplicate_and_unknown_events_ignored(registry):
+    """Redelivered events count once; reverts of unknown PRs are dropped."""
+    store = FeedbackStore(registry)
+    assert store.apply(merged(1)) == 'SECRETS_001'
+    assert store.apply(merged(1)) is None
+    assert store.apply({'type': 'reverted', 'repo': 'org/app', 'pr_number': 99}) is None
+    assert store.templates['SECRETS_001'].merged == 1
+    with pytest.raises(ValueError):
+        store.apply({'type': 'opened', 'repo': 'org/app', 'pr_number': 1})
+
+
+def test_state_persists_across_restarts(registry, tmp_path):
+    """Aggregates, PR attribution and log offsets survive a reload."""
+    state = str(tmp_path / 'state.json')
+    log_path = tmp_path / 'events.jsonl'
+    log_path.write_text('\n'.join(json.dumps(merged(n)) for n in range(10)) + '\n')
+
+    store = FeedbackStore(registry, state)
+    store.ingest_log(EventLog(str(log_path)))
+    store.save()
+
+    reloaded = FeedbackStore(registry, state)
+    assert reloaded.scores == store.scores
+    assert reloaded.ingest_log(EventLog(str(log_path))) == {}
+    assert reloaded.apply({'type': 'reverted', 'repo': 'org/app', 'pr_number': 3}) == 'SECRETS_001'
+
+
+def test_bad_event_in_log_skipped(registry, tmp_path):
+    """An invalid line is skipped without losing the events after it."""
+    log_path = tmp_path / 'events.jsonl'
+    lines = [merged(1), {'type': 'opened'}, merged(2), {'type': 'merged', 'template_id': 'SECRETS_001'},
+             merged(3)]
+    log_path.write_text(''.join(json.dumps(line) + '\n' for line in lines))
+
+    store = FeedbackStore(registry, str(tmp_path / 'state.json'))
+    assert list(store.ingest_log(EventLog(str(log_path)))) == ['SECRETS_001']
+    assert store.templates['SECRETS_001'].merged == 3
+    assert store.offsets[str(log_path)] == log_path.stat().st_size
+
+
+def test_bad_numeric_field_in_log_skipped(registry, tmp_path):
+    """Non-numeric merge times never reach the median sketches."""
+    log_path = tmp_path / 'events.jsonl'
+    bad = [dict(merged(2), merge_time_hours='3.5'), dict(merged(3), discussion_density=float('nan')),
+           dict(merged(4), merge_time_hours=True), dict(merged(5), template_id=['SECRETS_001'])]
+    lines = [merged(1)] + bad + [merged(6)]
+    log_path.write_text(''.join(json.dumps(line) + '\n' for line in lines))
+
+    store = FeedbackStore(registry, str(tmp_path / 'state.json'))
+    assert list(store.ingest_log(EventLog(str(log_path)))) == ['SECRETS_001']
+    assert store.templates['SECRETS_001'].merged == 2
+    assert store.offsets[str(log_path)] == log_path.stat().st_size
+    assert store.ingest([merged(7)]) == {'SECRETS_001': store.scores['SECRETS_001']}
+
+
+def test_rejections_lower_confidence(registry):
+    """Closed (rejected) PRs count as failures alongside reverts."""
+    store = FeedbackStore(registry)
+    before = store.scores['SECRETS_001']['overall_confidence']
+    closed = [{'type': 'closed', 'template_id': 'SECRETS_001', 'repo': 'org/app', 'pr_number': n}
+              for n in range(100)]
+    updated = store.ingest(closed)
+    assert updated['SECRETS_001']['overall_confidence'] < before
+    evidence = store.templates['SECRETS_001'].evidence()
+    assert evidence['occurrence_count'] == 234
+    assert evidence['revert_rate'] == pytest.approx(100 / 334)
+
+
+def test_tracked_prs_are_bounded(registry, tmp_path):
+    """Only the newest PRs are remembered for deduplication."""
+    state = str(tmp_path / 'state.json')
+    store = FeedbackStore(registry, state, max_tracked_prs=10)
+    store.ingest([merged(n) for n in range(25)])
+    assert list(store.merged_prs) == [f"org/app#{n}" for n in range(15, 25)]
+    store.save()
+
+    reloaded = FeedbackStore(registry, state, max_tracked_prs=10)
+    assert reloaded.apply(merged(24)) is None
+    assert reloaded.apply({'type': 'reverted', 'repo': 'org/app', 'pr_number': 20}) == 'SECRETS_001'
+    assert reloaded.apply({'type': 'reverted', 'repo': 'org/app', 'pr_number': 3}) is None
+
+
+def test_event_log_leaves_partial_line(tmp_path):
+    """A half-written last line is picked up on the next read."""
+    path = tmp_path / 'events.jsonl'
+    path.write_text(json.dumps(merged(1)) + '\n{"type": "mer')
+    log = EventLog(str(path))
+    events, offset = log.read_new(0)
+    assert len(events) == 1
+
+    with open(path, 'a') as f:
+        f.write('ged", "repo": "org/app", "pr_number": 2}\n')
+    events, _ = log.read_new(offset)
+    assert events == [{'type': 'merged', 'repo': 'org/app', 'pr_number': 2}]
+
+
+def test_github_events_from_marker_and_revert():
+    """Template marker attributes merges; the revert button body names the PR."""
+    body = 'Fix\n\n' + TEMPLATE_MARKER.format(template_id='NULL_CHECK_001')
+    [event] = events_from_github(github_payload(5, body))
+    assert event['type'] == 'merged'
+    assert event['template_id'] == 'NULL_CHECK_001'
+    assert event['merge_time_hours'] == pytest.approx(6.0)
+
+    [event] = events_from_github(github_payload(6, body, merged=False))
+    assert event['type'] == 'closed'
+
+    [event] = events_from_github(github_payload(7, 'Reverts org/app#5'))
+    assert event == {'type': 'reverted', 'repo': 'org/app', 'pr_number': 5}
+    assert events_from_github({'action': 'opened'}) == []
+
+
+def test_webhook_updates_lookup_scores(registry):
+    """A signed webhook re-scores the template that lookups then return."""
+    index = PatternIndex(registry, engine=EmbeddingEngine('hashing'))
+    store = FeedbackStore(registry)
+    body = json.dumps(github_payload(
+        5, TEMPLATE_MARKER.format(template_id='NULL_CHECK_001')
+    )).encode()
+    signature = 'sha256=' + hmac.new(b'secret', body, hashlib.sha256).hexdigest()
+    assert verify_signature('secret', body, signature)
+
+    with LookupServer(index, port=0, feedback=store, webhook_secret='secret') as server:
+        with pytest.raises(HTTPError) as unsigned:
+            urlopen(Request(f"{server.url}/webhook/github", data=body, method='POST'))
+        assert unsigned.value.code == 401
+
+        request = Request(f"{server.url}/webhook/github", data=body, method='POST',
+                          headers={'X-Hub-Signature-256': signature})
+        assert json.load(urlopen(request))['rescored'] == ['NULL_CHECK_001']
+        report = json.load(urlopen(f"{server.url}/feedback"))
+
+    assert report['NULL_CHECK_001']['live']['merged'] == 1
+    match = index.lookup([{'snippet': 'if (x) {'}], k=1)[0][0]
+    assert match['confidence_scores'] == store.scores['NULL_CHECK_001']
@@ -0,0 +1,202 @@
+import json
+import subprocess
+
+import pytest
+from engine.fleet.scheduler import DONE, FAILED, FleetScheduler, JobStore, RepoSpec, load_manifest
+from engine.matcher import TemplateMatcher
+from engine.templates import TemplateRegistry
+
+SECRET_TEMPLATE = """
+id: TEST_SECRET
+name: Test secret
+confidence: 0.9
+risk_tier: SAFE
+languages: [javascript]
+pattern:
+  match: 'const {{VAR}} = "{{SECRET}}"'
+  replace: 'const {{VAR}} = process.env.{{VAR}}'
+pr_template:
+  title: "Remove hardcoded secret in {{file}}"
+  body: "Removes hardcoded credential."
+"""
+
+
+def failing_runner(job, output_dir, profile_dir=None):
+    raise RuntimeError("boom")
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    (template_dir / "test_secret.yaml").write_text(SECRET_TEMPLATE)
+    repos = []
+    for name in ("svc-a", "svc-b"):
+        repo = tmp_path / name
+        repo.mkdir()
+        (repo / "config.js").write_text('const API_KEY = "abc123";\n')
+        repos.append(RepoSpec(name=name, path=str(repo)))
+    return TemplateRegistry.from_directory(str(template_dir)), repos, tmp_path
+
+
+def test_matcher_fix():
+    """Test template pattern matching and substitution."""
+    matcher = TemplateMatcher({
+        'id': 'T', 'languages': ['javascript'],
+        'pattern': {'match': 'const {{VAR}} = "{{SECRET}}"',
+                    'replace': 'const {{VAR}} = process.env.{{VAR}}'},
+    })
+    findings = matcher.scan_text('x;\nconst TOKEN = "s3cret";\n', 'a.js')
+    assert findings[0].line == 2
+    assert findings[0].bindings == {'VAR': 'TOKEN', 'SECRET': 's3cret'}
+    assert matcher.fix_text('const TOKEN = "s3cret";')[0] == 'const TOKEN = process.env.TOKEN;'
+
+
+def test_ranked_by_risk_tier():
+    """Safer templates are scheduled first."""
+    registry = TemplateRegistry([
+        {'id': 'A', 'confidence': 0.99, 'risk_tier': 'MODERATE'},
+        {'id': 'B', 'confidence': 0.80, 'risk_tier': 'ULTRA_SAFE'},
+    ])
+    assert [t['id'] for t in registry.ranked()] == ['B', 'A']
+
+
+def test_invalid_templates_skipped(tmp_path):
+    """Templates failing TemplateValidator never reach the scheduler."""
+    (tmp_path / "good.yaml").write_text(SECRET_TEMPLATE)
+    (tmp_path / "word.yaml").write_text(SECRET_TEMPLATE.replace("id: TEST_SECRET", "id: WORD")
+                                        .replace("confidence: 0.9", "confidence: high"))
+    (tmp_path / "list.yaml").write_text("- id: LIST\n")
+    registry = TemplateRegistry.from_directory(str(tmp_path))
+    assert [t['id'] for t in registry.ranked()] == ['TEST_SECRET']
+
+
+@pytest.mark.parametrize("manifest, error", [
+    ("repos: [/srv/x/api, /srv/y/api]", "repo name 'api'"),
+    ("defaults: {max_concurrency: 0}\nrepos: [/srv/x/api]", "max_concurrency"),
+    ("repos: [{path: /srv/x/api, max_concurrency: -1}]", "max_concurrency"),
+])
+def test_manifest_rejected(tmp_path, manifest, error):
+    """Duplicate names and non-positive concurrency are manifest errors."""
+    manifest_file = tmp_path / "fleet.yaml"
+    manifest_file.write_text(manifest)
+    with pytest.raises(ValueError, match=error):
+        load_manifest(str(manifest_file))
+
+
+def test_manifest_names(tmp_path):
+    """Checkouts sharing a directory name can be told apart by name."""
+    manifest_file = tmp_path / "fleet.yaml"
+    manifest_file.write_text("repos:\n  - {name: x/api, path: /srv/x/api}\n  - /srv/y/api\n")
+    assert [repo.name for repo in load_manifest(str(manifest_file))] == ['x/api', 'api']
+
+
+def test_fleet_run(fleet):
+    """Test full scan -> fix -> validate -> pr run across repos."""
+    registry, repos, tmp_path = fleet
+    scheduler = FleetScheduler(
+        repos, registry,
+        state_file=str(tmp_path / "state.json"),
+        output_dir=str(tmp_path / "out"),
+        max_workers=2,
+    )
+    assert scheduler.run() == {DONE: 2}
+
+    draft = json.loads((tmp_path / "out" / "svc-a" / "TEST_SECRET.pr.json").read_text())
+    assert "remediation-template: TEST_SECRET" in draft['body']
+    # Checkout is never modified
+    assert 'abc123' in (tmp_path / "svc-a" / "config.js").read_text()
+
+
+def test_fleet_resume(fleet):
+    """Completed jobs are not rerun after a restart."""
+    registry, repos, tmp_path = fleet
+    state_file = str(tmp_path / "state.json")
+    FleetScheduler(repos, registry, state_file=state_file,
+                   output_dir=str(tmp_path / "out"), max_workers=1).run()
+
+    rerun = FleetScheduler(repos, registry, state_file=state_file,
+                           output_dir=str(tmp_path / "out"), max_workers=1,
+                           stage_runner=failing_runner)
+    assert rerun.run() == {DONE: 2}
+
+
+def test_fleet_rescans_moved_checkout(fleet):
+    """Done jobs rerun when the checkout's HEAD moves, or with fresh=True."""
+    registry, repos, tmp_path = fleet
+    repo = repos[0].path
+
+    def git(*args):
+        subprocess.run(['git', '-C', repo, '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+                       check=True, capture_output=True)
+
+    git('init', '-q')
+    git('add', '.')
+    git('commit', '-qm', 'init')
+    kwargs = dict(state_file=str(tmp_path / "state.json"), output_dir=str(tmp_path / "out"),
+                  max_workers=1)
+    FleetScheduler(repos, registry, **kwargs).run()
+    failing = dict(kwargs, stage_runner=failing_runner, max_attempts=1)
+    assert FleetScheduler(repos, registry, **failing).run() == {DONE: 2}
+
+    git('commit', '-q', '--allow-empty', '-m', 'next')
+    assert FleetScheduler(repos, registry, **failing).run() == {DONE: 1, FAILED: 1}
+    assert FleetScheduler(repos, registry, fresh=True, **failing).run() == {FAILED: 2}
+
+
+def test_fleet_failure_retries(fleet):
+    """Failing jobs are retried then marked failed."""
+    registry, repos, tmp_path = fleet
+    scheduler = FleetScheduler(repos, registry, state_file=str(tmp_path / "state.json"),
+                               max_workers=1, max_attempts=2, stage_runner=failing_runner)
+    assert scheduler.run() == {FAILED: 2}
+    jobs = JobStore(str(tmp_path / "state.json")).load()
+    assert all(job.attempts == 2 for job in jobs.values())
+
+
+def test_fleet_shipped_templates(tmp_path):
+    """Fixes whose output matches their own template again still validate."""
+    repo = tmp_path / "app"
+    repo.mkdir()
+    (repo / "app.js").write_text(
+        'client.connect();\n'
+        'try { run(); }\n'
+        'if (user) {\n}\n'
+        '"lodash": "4.17.20"\n'
+    )
+    scheduler = FleetScheduler(
+        [RepoSpec(name="app", path=str(repo))],
+        TemplateRegistry.from_directory("templates"),
+        state_file=str(tmp_path / "state.json"),
+        output_dir=str(tmp_path / "out"),
+        max_workers=2,
+    )
+    summary = scheduler.run()
+    assert FAILED not in summary
+    for template_id in ("DEPRECATED_001", "ERROR_HANDLING_001", "NULL_CHECK_001"):
+        assert scheduler.jobs[f"app:{template_id}"].context['validated']
+
+
+def test_validation_failure_not_retried(tmp_path):
+    """A fix that breaks the file fails once, without a retry."""
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    (template_dir / "broken.yaml").write_text(
+        "id: BROKEN\nname: Broken\nconfidence: 0.9\nrisk_tier: SAFE\nlanguages: [python]\n"
+        "pattern:\n  match: 'old({{X}})'\n  replace: 'new({{X}}'\n"
+    )
+    repo = tmp_path / "app"
+    repo.mkdir()
+    (repo / "app.py").write_text('old(a)\n')
+    scheduler = FleetScheduler(
+        [RepoSpec(name="app", path=str(repo))],
+        TemplateRegistry.from_directory(str(template_dir)),
+        state_file=str(tmp_path / "state.json"),
+        output_dir=str(tmp_path / "out"),
+        max_workers=1,
+        max_attempts=3,
+    )
+    assert scheduler.run() == {FAILED: 1}
+    job = scheduler.jobs["app:BROKEN"]
+    assert job.stage == 'validate'
+    assert job.error.startswith('ValidationError')
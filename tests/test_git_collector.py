@@ -0,0 +1,116 @@
+import os
+import subprocess
+
+import pytest
+from research.collectors.git_collector import GitMirrorCollector
+
+HOUR = 3600
+T0 = 1_700_000_000
+
+
+def git(repo, *args, at=None):
+    env = dict(os.environ, GIT_AUTHOR_NAME='dev', GIT_AUTHOR_EMAIL='dev@example.com',
+               GIT_COMMITTER_NAME='dev', GIT_COMMITTER_EMAIL='dev@example.com')
+    if at is not None:
+        env['GIT_AUTHOR_DATE'] = env['GIT_COMMITTER_DATE'] = f"@{at} +0000"
+    return subprocess.run(['git', '-C', str(repo), *args], env=env, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def commit(repo, name, content, message, at):
+    (repo / name).write_text(content)
+    git(repo, 'add', name)
+    git(repo, 'commit', '-q', '-m', message, at=at)
+    return git(repo, 'rev-parse', 'HEAD')
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """Repo with a merge-commit PR, a squash PR and a revert of the merge."""
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    git(repo, 'init', '-q', '-b', 'main')
+    commit(repo, 'README', 'hello\n', 'Initial commit', T0)
+
+    git(repo, 'checkout', '-q', '-b', 'fix-xss')
+    commit(repo, 'a.js', 'one\ntwo\n', 'Escape output', T0 + HOUR)
+    commit(repo, 'b.js', 'three\n', 'Add test', T0 + 2 * HOUR)
+    git(repo, 'checkout', '-q', 'main')
+    git(repo, 'merge', '-q', '--no-ff', 'fix-xss', '-m',
+        'Merge pull request #1 from alice/fix-xss\n\nFix XSS in renderer\n\nEscapes user input.',
+        at=T0 + 5 * HOUR)
+    merge_sha = git(repo, 'rev-parse', 'HEAD')
+
+    commit(repo, 'c.py', 'x\ny\nz\n', 'Fix secret leak (#2)', T0 + 6 * HOUR)
+    commit(repo, 'README', 'hello again\n', 'Update docs', T0 + 7 * HOUR)
+
+    git(repo, 'revert', '--no-edit', '-m', '1', merge_sha, at=T0 + 15 * HOUR)
+    return str(repo)
+
+
+def collect(mirror, **kwargs):
+    collector = GitMirrorCollector({'acme/widgets': mirror}, output_file=os.devnull, **kwargs)
+    return {pr.pr_number: pr for pr in collector.iter_repo_prs('acme', 'widgets', False)}
+
+
+def test_merge_and_squash_prs_recovered(mirror):
+    """Test merge commits and squash subjects both become PRs."""
+    prs = collect(mirror, min_merge_time_hours=0)
+    assert sorted(prs) == [1, 2]
+
+    merged = prs[1]
+    assert merged.title == 'Fix XSS in renderer'
+    assert merged.body == 'Escapes user input.'
+    assert merged.author == 'alice'
+    assert merged.commits == 2
+    assert merged.files_changed == 2
+    assert merged.additions == 3
+    assert merged.merge_time_hours == pytest.approx(4.0)
+    assert merged.is_security_related
+
+    squashed = prs[2]
+    assert squashed.title == 'Fix secret leak'
+    assert squashed.files_changed == 1
+    assert squashed.additions == 3
+    # A squash commit does not record when the PR was opened
+    assert squashed.created_at is None
+    assert squashed.merge_time_hours is None
+
+
+def test_revert_detected(mirror):
+    """Test a revert commit marks the reverted PR with its delay."""
+    prs = collect(mirror, min_merge_time_hours=0)
+    assert prs[1].has_revert
+    assert prs[1].revert_time_hours == pytest.approx(10.0)
+    assert not prs[2].has_revert
+    assert prs[2].revert_time_hours is None
+
+
+def test_abbreviated_reverts_matched_by_prefix():
+    """Reverts naming a sha at any abbreviation match; the earliest wins."""
+    sha = 'abcdef0123456789' * 2 + 'abcdefgh'
+    reverts = {'abcdef0': [('abcdef0123', 50), ('abcdef0999', 10)], '1234567': [('1234567', 5)]}
+    assert GitMirrorCollector._revert_time([sha], reverts) == 50
+    assert GitMirrorCollector._revert_time(['0' * 40, sha], reverts) == 50
+    assert GitMirrorCollector._revert_time(['abcdef1' + '0' * 33], reverts) is None
+
+
+def test_min_merge_time_filter(mirror):
+    """Test the filter drops fast merges but keeps squash PRs of unknown age."""
+    assert sorted(collect(mirror, min_merge_time_hours=0.5)) == [1, 2]
+    assert sorted(collect(mirror, min_merge_time_hours=5)) == [2]
+
+
+def test_prs_past_cap_not_walked(mirror, monkeypatch):
+    """Branch walks stop once max_prs_per_repo PRs are collected."""
+    built = []
+    original = GitMirrorCollector._build
+
+    def build(self, owner, repo, path, commit, pr, reverts):
+        built.append(pr['number'])
+        return original(self, owner, repo, path, commit, pr, reverts)
+
+    monkeypatch.setattr(GitMirrorCollector, '_build', build)
+    prs = collect(mirror, min_merge_time_hours=0, max_prs_per_repo=1, workers=1)
+    assert list(prs) == [2]
+    assert built == [2]
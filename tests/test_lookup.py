@@ -0,0 +1,100 @@
+import http.client
+import json
+import socket
+from urllib.request import Request, urlopen
+
+import pytest
+from engine.benchmarks.generators import generate_sarif
+from engine.lookup.index import PatternIndex, diff_code, template_text
+from engine.lookup.server import LookupServer
+from engine.templates import TemplateRegistry
+from research.embeddings import EmbeddingEngine, HashingModel
+
+
+@pytest.fixture(scope='module')
+def registry():
+    return TemplateRegistry.from_directory("templates")
+
+
+@pytest.fixture(scope='module')
+def index(registry):
+    """Index with one research cluster near the secrets template."""
+    text = template_text(registry.get('SECRETS_001')) + "\nrotate leaked token credentials"
+    centroid = HashingModel().encode([text])[0]
+    patterns = [{
+        'cluster_id': 7,
+        'centroid': centroid.tolist(),
+        'confidence_scores': {'overall_confidence': 0.9},
+    }]
+    return PatternIndex(registry, patterns, EmbeddingEngine('hashing'))
+
+
+def test_sarif_rule_id_wins(index):
+    """A SARIF result whose rule is a template id returns that template."""
+    report = generate_sarif(20, list(index.templates), seed=2)
+    queries = [{'sarif': result} for result in report['runs'][0]['results']]
+    for query, matches in zip(queries, index.lookup(queries, k=2)):
+        assert matches[0]['template_id'] == query['sarif']['ruleId']
+        assert matches[0]['match'] == 'rule'
+        assert 'overall_confidence' in matches[0]['confidence_scores']
+
+
+def test_snippet_and_diff_match_patterns(index):
+    """Code that the template's pattern matches ranks that template first."""
+    snippet, diff = index.lookup([
+        {'snippet': 'const API_KEY = "abc123";', 'path': 'config.js'},
+        {'diff': '--- a/x.js\n+++ b/x.js\n@@ -1 +1 @@\n-if (user) {\n+if (user != null) {\n'},
+    ], k=1)
+    assert snippet[0]['template_id'] == 'SECRETS_001'
+    assert snippet[0]['match'] == 'pattern'
+    assert diff[0]['template_id'] == 'NULL_CHECK_001'
+
+
+def test_semantic_match_via_cluster_centroid(index):
+    """Free text near a research cluster returns the cluster's template."""
+    matches = index.lookup([{'snippet': 'rotate leaked token credentials'}], k=1)[0]
+    assert matches[0]['template_id'] == 'SECRETS_001'
+    assert matches[0]['match'] == 'semantic'
+    assert matches[0]['pattern']['cluster_id'] == 7
+
+
+def test_diff_code_strips_headers():
+    """Only changed lines are kept."""
+    diff = 'diff --git a/x b/x\n--- a/x\n+++ b/x\n@@ -1,2 +1,2 @@\n context\n-old\n+new\n'
+    assert diff_code(diff) == 'old\nnew'
+
+
+def test_bad_query_rejected(index):
+    with pytest.raises(ValueError):
+        index.lookup([{'unknown': 1}])
+
+
+def test_http_server(index):
+    """Batched SARIF report and health check over TCP."""
+    report = generate_sarif(5, list(index.templates), seed=1)
+    with LookupServer(index, port=0) as server:
+        assert json.load(urlopen(f"{server.url}/health"))['templates'] == len(index.templates)
+        request = Request(f"{server.url}/lookup", data=json.dumps({'sarif': report, 'k': 1}).encode(),
+                          method='POST')
+        response = json.load(urlopen(request))
+    assert len(response['results']) == 5
+    assert all(len(matches) == 1 for matches in response['results'])
+
+
+def test_unix_socket_server(index, tmp_path):
+    """Same API over a Unix domain socket."""
+    path = str(tmp_path / 'lookup.sock')
+
+    class UnixConnection(http.client.HTTPConnection):
+        def connect(self):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+
+    with LookupServer(index, socket_path=path):
+        connection = UnixConnection('localhost')
+        connection.request('POST', '/lookup', body=json.dumps({'snippet': 'if (x) {'}))
+        response = json.loads(connection.getresponse().read())
+        connection.request('POST', '/lookup', body=b'not json')
+        assert connection.getresponse().status == 400
+        connection.close()
+    assert response['results'][0][0]['template_id'] == 'NULL_CHECK_001'
@@ -0,0 +1,54 @@
+from research.instrumentation.metrics import MetricsRegistry
+
+
+def test_disabled_registry_records_nothing():
+    """Test disabled registry is a no-op."""
+    registry = MetricsRegistry()
+    registry.inc('calls')
+    with registry.timer('work'):
+        pass
+    assert registry.snapshot() == {'counters': {}, 'histograms': {}}
+
+
+def test_counters_and_histograms():
+    """Test labeled counters and histogram buckets."""
+    registry = MetricsRegistry(enabled=True)
+    registry.inc('api_calls', endpoint='pull')
+    registry.inc('api_calls', 2, endpoint='pull')
+    registry.observe('latency', 0.02)
+    registry.observe('latency', 3.0)
+
+    snapshot = registry.snapshot()
+    assert snapshot['counters']['api_calls'] == [{'labels': {'endpoint': 'pull'}, 'value': 3}]
+    hist = snapshot['histograms']['latency'][0]
+    assert hist['count'] == 2
+    assert hist['max'] == 3.0
+
+
+def test_merge_worker_snapshots():
+    """Test folding worker recordings into the parent."""
+    parent = MetricsRegistry(enabled=True)
+    worker = MetricsRegistry(enabled=True)
+    for registry in (parent, worker):
+        registry.inc('records', 5, stage='analyze')
+        registry.observe('seconds', 0.5, stage='analyze')
+
+    parent.merge(worker.drain())
+    assert parent.counters['records'][(('stage', 'analyze'),)] == 10
+    assert parent.histograms['seconds'][(('stage', 'analyze'),)].count == 2
+    assert worker.snapshot() == {'counters': {}, 'histograms': {}}
+
+
+def test_prometheus_format():
+    """Test Prometheus text exposition output."""
+    registry = MetricsRegistry(enabled=True)
+    registry.inc('api_calls_total', endpoint='search')
+    registry.observe('stage_seconds', 0.2, buckets=(0.1, 1.0))
+
+    text = registry.to_prometheus()
+    assert '# TYPE api_calls_total counter' in text
+    assert 'api_calls_total{endpoint="search"} 1' in text
+    assert 'stage_seconds_bucket{le="0.1"} 0' in text
+    assert 'stage_seconds_bucket{le="1.0"} 1' in text
+    assert 'stage_seconds_bucket{le="+Inf"} 1' in text
+    assert 'stage_seconds_count 1' in text
@@ -0,0 +1,81 @@
+import json
+
+from research.models.pr import DiffAnalysis, DiffColumns, PRMetadata
+
+
+def make_diff(repo, number, hours=1.0, reverted=False):
+    return DiffAnalysis(
+        pr_id=f"{repo}#{number}",
+        repo=repo,
+        title=f"Fix {number}",
+        body='Escape output.',
+        merge_time_hours=hours,
+        discussion_density=0.25,
+        is_security=True,
+        was_reverted=reverted,
+        fingerprint='00ff00ff00ff00ff',
+    )
+
+
+def test_records_are_slotted():
+    """Records carry no per-instance __dict__."""
+    assert not hasattr(make_diff('acme/api', 1), '__dict__')
+    assert 'title' in PRMetadata.__slots__
+
+
+def test_columns_round_trip():
+    """Materialized rows match what was appended."""
+    diffs = [make_diff('acme/api', 1), make_diff('acme/web', 2, hours=3.5, reverted=True)]
+    columns = DiffColumns.from_diffs(diffs)
+    assert len(columns) == 2
+    assert list(columns) == diffs
+    assert columns.was_reverted.tolist() == [False, True]
+
+
+def test_columns_intern_repos():
+    """Each repository name is stored once."""
+    columns = DiffColumns.from_diffs(make_diff('acme/api', n) for n in range(2000))
+    assert columns.repos == ['acme/api']
+    assert columns.repo_id.tolist() == [0] * 2000
+
+
+def test_columns_sort_order_is_arrival_independent():
+    """Sort order depends on (repo, number) only."""
+    diffs = [make_diff('b/x', 2), make_diff('a/x', 9), make_diff('b/x', 1)]
+    columns = DiffColumns.from_diffs(diffs)
+    ordered = columns.take(columns.sort_order())
+    assert [d.pr_id for d in ordered] == ['a/x#9', 'b/x#1', 'b/x#2']
+
+
+def test_columns_from_jsonl(tmp_path):
+    """Stream a JSONL file into columns."""
+    path = tmp_path / "prs.jsonl"
+    path.write_text('\n'.join(json.dumps({'n': n}) for n in range(3)) + '\n')
+    columns = DiffColumns.from_jsonl(str(path), lambda pr: make_diff('acme/api', pr['n']))
+    assert columns.pr_number.tolist() == [0, 1, 2]
+    columns.release_text()
+    assert columns[1].title == ''
+    assert columns[1].body == ''
+
+
+def test_cluster_patterns_leaves_embeddings_intact():
+    """Clustering standardizes a copy, so repeat calls see the same input."""
+    import numpy as np
+    from research.embeddings import EmbeddingEngine
+    from research.extractors.pattern_extractor import PatternExtractor
+
+    diffs = [make_diff(f"org/r{i % 3}", i) for i in range(30)]
+    embeddings = EmbeddingEngine('hashing').encode([d.title for d in diffs])
+    before = embeddings.values.copy()
+    first = PatternExtractor.cluster_patterns(diffs, embeddings)
+    assert np.array_equal(embeddings.values, before)
+    assert PatternExtractor.cluster_patterns(diffs, embeddings) == first
+
+
+def test_unknown_merge_time_round_trips():
+    """A None merge time is stored as NaN and materialized as None again."""
+    diff = make_diff('acme/api', 1)
+    diff.merge_time_hours = None
+    columns = DiffColumns.from_diffs([diff, make_diff('acme/api', 2)])
+    assert columns[0].merge_time_hours is None
+    assert columns[1].merge_time_hours == 1.0